@@ -37,6 +37,9 @@ import traceback
 from xml_conf import *
 from conf import *
 from log import *
+from log_async import AsyncLogListener
+from log_rotate import RotatingFile
+from log_ring import RingBufferLogListener, dump_ring_buffers
 from arg_parser import *
 
 _log = get_log (__name__)
@@ -57,6 +60,11 @@ class AppBase (object):
     LOG_FILE    = 'messages.log'
     CONFIG_FILE = 'config.xml'
 
+    LOG_MAX_BYTES    = 1 << 22
+    LOG_BACKUP_COUNT = 5
+    LOG_RING_SIZE    = 0
+    LOG_RING_FILE    = 'crash.log'
+
     LICENSE     = \
 """\
 This is free software; see the source for copying conditions.  There is NO
@@ -91,6 +99,7 @@ Options:
     def run (self):
         self._std_logger  = None
         self._file_logger = None
+        self._ring_logger = None
         self._log_file    = None
 
         if self.GLOBAL:
@@ -114,11 +123,12 @@ Options:
             ret_val = os.EX_OK
         except LoggableError, e:
             e.log ()
-            _log.debug (traceback.format_exc ())
+            _log.debug (traceback.format_exc)
             ret_val = e.get_code ()
         except Exception, e:
-            _log.fatal ("Unexpected error:\n" + e.message)
-            _log.debug (traceback.format_exc ())
+            _log.fatal ("Unexpected error:\n%s", e.message)
+            _log.debug (traceback.format_exc)
+            dump_ring_buffers ()
             ret_val = os.EX_SOFTWARE
 
         self.do_release ()
@@ -162,6 +172,8 @@ Options:
                 GlobalConf ().load ()
             except LoggableError, e:
                 e.log ()
+            if GlobalConf ().has_child ('log'):
+                configure_log (GlobalConf ().child ('log'))
 
     def save_config (self):
         if self.GLOBAL:
@@ -174,13 +186,24 @@ Options:
         if self.GLOBAL:
             fname = os.path.join (self.get_config_folder (), self.LOG_FILE)
             try:
-                self._log_file = open (fname, 'w')
-                self._file_logger = StdLogListener (LOG_INFO,
-                                                   self._log_file,
-                                                   self._log_file)
+                self._log_file = RotatingFile (
+                    fname,
+                    max_bytes      = self.LOG_MAX_BYTES,
+                    backup_count   = self.LOG_BACKUP_COUNT,
+                    rotate_on_open = True)
+                self._file_logger = AsyncLogListener (LOG_INFO,
+                                                     self._log_file,
+                                                     self._log_file)
                 GlobalLog ().connect (self._file_logger)
             except Exception:
-                _log.warning ("Could not open log file, " + fname)
+                _log.warning ("Could not open log file, %s", fname)
+
+            if self.LOG_RING_SIZE:
+                self._ring_logger = RingBufferLogListener (
+                    self.LOG_RING_SIZE,
+                    fname = os.path.join (self.get_config_folder (),
+                                          self.LOG_RING_FILE))
+                GlobalLog ().connect (self._ring_logger)
 
         if self._arg_verbose.value:
             if self._std_logger:
@@ -189,8 +212,13 @@ Options:
                 self._file_logger.level = LOG_DEBUG
 
     def close_log (self):
+        if self.GLOBAL and self._file_logger:
+            GlobalLog ().disconnect (self._file_logger)
+            self._file_logger.close ()
         if self.GLOBAL and self._log_file:
             self._log_file.close ()
+        if self.GLOBAL and self._ring_logger:
+            GlobalLog ().disconnect (self._ring_logger)
 
     def make_args (self):
         self._arg_verbose = OptionFlag ()
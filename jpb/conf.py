@@ -30,6 +30,9 @@ from observer import make_observer
 from singleton import Singleton
 from arg_parser import OptionBase
 from error import *
+from collections import OrderedDict
+import threading
+import thread
 
 class ConfError (BaseError):
     pass
@@ -42,7 +45,9 @@ ConfSubject, ConfListener = \
                     'on_conf_new_child' :
                     """ A new child has been created. """,
                     'on_conf_del_child' :
-                    """ A child has been deleted. """},
+                    """ A child has been deleted. """,
+                    'on_conf_commit' :
+                    """ A transaction changed the values of some nodes. """},
                    'Conf'
                    )
 
@@ -95,14 +100,286 @@ class NullBackend (object):
         pass
 
 
+class ConfSnapshot (object):
+    """
+    Immutable view of a ConfNode subtree at some point in time, as
+    returned by 'ConfNode.snapshot'. Snapshots share the subtrees that
+    did not change between them, so they can be kept and read from
+    any thread without locking.
+    """
+
+    __slots__ = ('_name', '_value', '_childs')
+
+    def __init__ (self, name, value, childs):
+        object.__setattr__ (self, '_name', name)
+        object.__setattr__ (self, '_value', value)
+        object.__setattr__ (self, '_childs', childs)
+
+    def __setattr__ (self, name, value):
+        raise AttributeError ("Configuration snapshots are immutable")
+
+    def get_name (self):
+        return self._name
+
+    def get_value (self):
+        return self._value
+
+    def child (self, name):
+        """
+        Returns the snapshot of the child named 'name'. Raises
+        KeyError if there is no such child.
+        """
+        return self._childs [name]
+
+    def has_child (self, name):
+        return name in self._childs
+
+    def childs (self):
+        return self._childs.values ()
+
+    def path (self, path_name):
+        """
+        Returns the snapshot of the descendant at 'path_name', a dot
+        separated list of names. Raises KeyError if it does not exist.
+        """
+        node = self
+        for name in path_name.split ('.'):
+            node = node._childs [name]
+        return node
+
+    def to_dict (self):
+        """ Same as 'ConfNode.to_dict'. """
+        if self._childs:
+            return dict ([(name, conf.to_dict ())
+                          for name, conf in self._childs.iteritems ()])
+        return self._value
+
+    name  = property (get_name)
+    value = property (get_value)
+
+
+class _ChildMap (object):
+    """
+    Persistent mapping from names to the snapshots of the childs of
+    a ConfSnapshot. The entries are spread over copy-on-write
+    buckets, so 'set' and 'remove' return a new map that copies a
+    single bucket and shares the rest with this one. There are about
+    as many buckets as entries in each, which keeps both copies
+    around the square root of the size of the map.
+    """
+
+    __slots__ = ('_buckets', '_len')
+
+    def __init__ (self, items = (), buckets = None, length = 0):
+        if buckets is None:
+            items = dict (items)
+            length = len (items)
+            size = 1
+            while size * size < length:
+                size *= 2
+            buckets = [ {} for i in xrange (size) ]
+            mask = size - 1
+            for key, val in items.iteritems ():
+                buckets [hash (key) & mask][key] = val
+            buckets = tuple (buckets)
+        self._buckets = buckets
+        self._len = length
+
+    def __len__ (self):
+        return self._len
+
+    def __contains__ (self, key):
+        buckets = self._buckets
+        return key in buckets [hash (key) & (len (buckets) - 1)]
+
+    def __getitem__ (self, key):
+        buckets = self._buckets
+        return buckets [hash (key) & (len (buckets) - 1)][key]
+
+    def iteritems (self):
+        for bucket in self._buckets:
+            for item in bucket.iteritems ():
+                yield item
+
+    def values (self):
+        return [ val for bucket in self._buckets
+                 for val in bucket.itervalues () ]
+
+    def set (self, key, val):
+        """ Returns a copy of this map with 'key' bound to 'val'. """
+        buckets = self._buckets
+        size = len (buckets)
+        index = hash (key) & (size - 1)
+        bucket = dict (buckets [index])
+        length = self._len + (key not in bucket)
+        bucket [key] = val
+        if length > 2 * size * size:
+            items = list (self.iteritems ())
+            items.append ((key, val))
+            return _ChildMap (items)
+        return self._replace (index, bucket, length)
+
+    def remove (self, key):
+        """ Returns a copy of this map without 'key'. """
+        buckets = self._buckets
+        index = hash (key) & (len (buckets) - 1)
+        bucket = dict (buckets [index])
+        del bucket [key]
+        return self._replace (index, bucket, self._len - 1)
+
+    def _replace (self, index, bucket, length):
+        buckets = list (self._buckets)
+        buckets [index] = bucket
+        return _ChildMap (buckets = tuple (buckets), length = length)
+
+
+_snapshot_lock = threading.RLock ()
+
+_transaction_lock  = threading.Lock ()
+_transaction_count = 0
+
+
+class ConfTransaction (object):
+    """
+    Groups the value changes in a ConfNode subtree, as returned by
+    'ConfNode.transaction'. Use it as a context manager:
+
+        with conf.transaction ():
+            conf.child ('a').value = 1
+            conf.child ('b').value = 2
+
+    Inside the block, the new values are kept in the transaction:
+    the thread that entered it reads them back from the nodes, but
+    other threads and the snapshots still see the old values and no
+    notifications are sent. When the block finishes, the values are
+    applied at once, the transaction node sends one 'on_conf_commit'
+    with the list of changed nodes and every backend involved is
+    notified once; the backend of the transaction node with the
+    transaction node, other backends with each of their changed
+    nodes. Every changed node still sends its own 'on_conf_change'
+    too, so listeners that want a single notification per
+    transaction should handle 'on_conf_commit' instead. If the block
+    raises an exception, the staged values are discarded and the
+    nodes are left untouched. Transactions started in a subtree that
+    already has one join the enclosing one.
+
+    A transaction only stages the changes made by the thread that
+    entered it. Other threads keep writing through as usual, and a
+    commit overwrites the values they wrote in the meantime.
+
+    Only values are transactional. Adding, removing or renaming
+    nodes inside the block takes effect immediately.
+    """
+
+    def __init__ (self, node):
+        self.node     = node
+        self._changes = OrderedDict ()
+        self._nested  = False
+        self._thread  = None
+
+    def __enter__ (self):
+        global _transaction_count
+        if self.node._find_transaction () is not None:
+            self._nested = True
+        else:
+            self._thread = thread.get_ident ()
+            with _transaction_lock:
+                _transaction_count += 1
+                if self.node._transactions is None:
+                    self.node._transactions = {}
+                self.node._transactions [self._thread] = self
+        return self
+
+    def __exit__ (self, exc_type, exc_value, traceback):
+        global _transaction_count
+        if not self._nested:
+            with _transaction_lock:
+                del self.node._transactions [self._thread]
+                if not self.node._transactions:
+                    self.node._transactions = None
+                _transaction_count -= 1
+            if exc_type is None:
+                self.commit ()
+            else:
+                self.rollback ()
+        return False
+
+    def stage (self, node, val):
+        """
+        Records 'val' as the new value of 'node'.
+        """
+        self._changes [node] = val
+
+    def staged (self, node, default = None):
+        """
+        Returns the value staged for 'node', or 'default' if it has
+        not been changed in this transaction.
+        """
+        return self._changes.get (node, default)
+
+    def commit (self):
+        """
+        Applies the staged changes and sends their notifications.
+        """
+        changes, self._changes = self._changes, OrderedDict ()
+        if not changes:
+            return
+        with _snapshot_lock:
+            for node, val in changes.iteritems ():
+                node._val = val
+            _update_snapshots (changes)
+        for node in changes:
+            node.on_conf_change (node)
+        self.node.on_conf_commit (list (changes))
+
+        backend = self.node._backend
+        backend._handle_conf_change (self.node)
+        for node in changes:
+            if node._backend is not backend:
+                node._backend._handle_conf_change (node)
+
+    def rollback (self):
+        """
+        Discards the staged changes.
+        """
+        self._changes = OrderedDict ()
+
+
+def _update_snapshots (nodes):
+    """
+    Updates at once the snapshots of all the 'nodes' and their
+    parents, so every node is copied only once.
+    """
+    with _snapshot_lock:
+        affected = {}
+        changed  = {}
+        for node in nodes:
+            while node is not None and node._conf_snapshot is not None \
+                      and node not in affected:
+                affected [node] = len (node.get_path_list ())
+                parent = node._parent
+                if parent is not None:
+                    changed.setdefault (parent, []).append (node)
+                node = parent
+        for node in sorted (affected, key = affected.get, reverse = True):
+            snap = node._conf_snapshot
+            value = node._val if node in nodes else snap._value
+            childs = snap._childs
+            for child in changed.get (node, ()):
+                childs = childs.set (child._name, child._conf_snapshot)
+            node._conf_snapshot = ConfSnapshot (snap._name, value, childs)
+
+
 class ConfNode (ConfSubject, AutoTree):
 
     def __init__ (self, content = None, *a, **k):
         super (ConfNode, self).__init__ (*a, **k)
         self._val = None
         self._backend = NullBackend ()
+        self._conf_snapshot = None
+        self._transactions = None
         if content:
-            self.fill (content)
+            self._bulk_fill (content)
 
     def fill (self, dict_):
         for key, val in dict_.iteritems ():
@@ -111,6 +388,37 @@ class ConfNode (ConfSubject, AutoTree):
             else:
                 self.child (key).value = val
 
+    def bulk_fill (self, dict_):
+        """
+        Like 'fill', but inserts the whole dictionary without sending
+        any notification for the individual nodes. Instead, a single
+        'on_conf_change' is sent by this node and its backend is
+        notified once, when the whole dictionary has been inserted.
+        """
+        self._bulk_fill (dict_)
+        if self._conf_snapshot is not None:
+            with _snapshot_lock:
+                self._build_snapshot ()
+                self._set_snapshot (self._conf_snapshot)
+        self.on_conf_change (self)
+        self._backend._handle_conf_change (self)
+
+    def _bulk_fill (self, dict_):
+        childs = self._childs
+        for key, val in dict_.iteritems ():
+            child = childs.get (key)
+            if child is None:
+                child = self._bulk_new_child (key)
+            if isinstance (val, dict):
+                child._bulk_fill (val)
+            else:
+                child._val = val
+
+    def _bulk_new_child (self, name):
+        child = self._link_child (self._make_child_node (), name)
+        child._backend = self._backend
+        return child
+
     def to_dict (self):
         """
         NOTE: This might loose information if some node has both value
@@ -128,16 +436,35 @@ class ConfNode (ConfSubject, AutoTree):
         return self._parent
 
     def default (self, val):
+        if _transaction_count:
+            transaction = self._find_transaction ()
+            if transaction is not None:
+                if transaction.staged (self, self._val) is None:
+                    transaction.stage (self, val)
+                return
         if self._val is None:
             self._val = val
+            if self._conf_snapshot is not None:
+                self._update_snapshot ()
 
     def set_value (self, val):
+        if _transaction_count:
+            transaction = self._find_transaction ()
+            if transaction is not None:
+                transaction.stage (self, val)
+                return self
         self._val = val
+        if self._conf_snapshot is not None:
+            self._update_snapshot ()
         self.on_conf_change (self)
         self._backend._handle_conf_change (self)
         return self
 
     def get_value (self):
+        if _transaction_count:
+            transaction = self._find_transaction ()
+            if transaction is not None:
+                return transaction.staged (self, self._val)
         return self._val
 
     def load (self, overwrite = False):
@@ -159,12 +486,58 @@ class ConfNode (ConfSubject, AutoTree):
     def get_backend (self):
         return self._backend
 
+    def snapshot (self):
+        """
+        Returns a ConfSnapshot with the current state of this
+        subtree. The first call takes time proportional to the size
+        of the subtree. Afterwards, the snapshot is kept up to date
+        as the subtree changes, copying only the nodes in the path
+        from the changed node to this one. Each of those copies
+        shares most of its childs with the previous one, so a change
+        costs about the square root of the number of siblings at
+        every level.
+        """
+        if self._conf_snapshot is None:
+            self._build_snapshot ()
+        return self._conf_snapshot
+
+    def transaction (self):
+        """
+        Returns a ConfTransaction that groups the value changes in
+        this subtree.
+        """
+        return ConfTransaction (self)
+
+    def remove (self, name):
+        child = super (ConfNode, self).remove (name)
+        if child._conf_snapshot is not None:
+            child._update_snapshot ()
+        if self._conf_snapshot is not None:
+            with _snapshot_lock:
+                snap = self._conf_snapshot
+                self._set_snapshot (ConfSnapshot (snap._name, snap._value,
+                                                  snap._childs.remove (name)))
+        return child
+
+    def rename (self, name):
+        old_name = self._name
+        super (ConfNode, self).rename (name)
+        if self._conf_snapshot is not None:
+            with _snapshot_lock:
+                snap = self._conf_snapshot
+                self._set_snapshot (ConfSnapshot (name, snap._value,
+                                                  snap._childs), old_name)
+
     def nudge (self):
         self.on_conf_nudge (self)
         self._backend._handle_conf_nudge (self)
 
     def _handle_tree_new_child (self, child):
         child._backend = self._backend
+        if self._conf_snapshot is not None:
+            with _snapshot_lock:
+                child._build_snapshot ()
+                child._set_snapshot (child._conf_snapshot)
         self._backend._handle_conf_new_node (child)
         self.on_conf_new_child (child)
 
@@ -173,9 +546,65 @@ class ConfNode (ConfSubject, AutoTree):
         self.on_conf_del_child (child)
 
     def _set_backend (self, be):
-        def assign (self):
-            self._backend = be
-        self.dfs_preorder (assign)
+        for node in self.iter_preorder ():
+            node._backend = be
+
+    def _find_transaction (self):
+        ident = None
+        node = self
+        while node is not None:
+            if node._transactions is not None:
+                if ident is None:
+                    ident = thread.get_ident ()
+                transaction = node._transactions.get (ident)
+                if transaction is not None:
+                    return transaction
+            node = node._parent
+        return None
+
+    def _build_snapshot (self):
+        with _snapshot_lock:
+            nodes = []
+            for node in self.iter_preorder ():
+                node.childs ()
+                nodes.append (node)
+            for node in reversed (nodes):
+                node._conf_snapshot = node._make_snapshot ()
+
+    def _update_snapshot (self):
+        # The snapshot must be read under the same lock hold that
+        # replaces it, or a concurrent update of a child is lost.
+        with _snapshot_lock:
+            snap = self._conf_snapshot
+            self._set_snapshot (ConfSnapshot (self._name, self._val,
+                                              snap._childs))
+
+    def _set_snapshot (self, snap, old_name = None):
+        """
+        Makes 'snap' the snapshot of this node and copies the ones of
+        its ancestors to point to it. If given, 'old_name' is removed
+        from the snapshot of the parent.
+        """
+        with _snapshot_lock:
+            node = self
+            while True:
+                node._conf_snapshot = snap
+                parent = node._parent
+                if parent is None or parent._conf_snapshot is None:
+                    break
+                parent_snap = parent._conf_snapshot
+                childs = parent_snap._childs
+                if old_name is not None:
+                    childs = childs.remove (old_name)
+                    old_name = None
+                snap = ConfSnapshot (parent_snap._name, parent_snap._value,
+                                     childs.set (node._name, snap))
+                node = parent
+
+    def _make_snapshot (self):
+        return ConfSnapshot (self._name, self._val, _ChildMap (
+            (name, child._conf_snapshot)
+            for name, child in self._childs.iteritems ()))
 
     def _test_empty_parent_be (self):
         return self._parent is None or \
@@ -184,6 +613,7 @@ class ConfNode (ConfSubject, AutoTree):
 
     backend = property (get_backend, set_backend)
     value = property (get_value, set_value)
+    name = property (AutoTree.get_name, rename)
 
 class GlobalConf (ConfNode):
 
@@ -31,12 +31,38 @@ Cooperative methods helper library.
 """
 
 import inspect
+import types
+import weakref
+from collections import namedtuple
 from functools import wraps
 
 class CooperativeError(TypeError): pass
 
+MethodSignature = namedtuple('MethodSignature', ['args', 'varargs',
+                                                 'keywords', 'defaults',
+                                                 'key_args'])
+
+_signatures = weakref.WeakKeyDictionary()
+
+def analyze_method(method):
+    """
+    Returns the MethodSignature of 'method', which is its argspec
+    plus the names of the parameters with default values in
+    'key_args'. The result is computed once per function.
+    """
+
+    try:
+        return _signatures[method]
+    except KeyError:
+        args, varargs, keywords, defaults = inspect.getargspec(method)
+        key_args = tuple(args[-len(defaults):]) if defaults else ()
+        signature = MethodSignature(args, varargs, keywords, defaults,
+                                    key_args)
+        _signatures[method] = signature
+        return signature
+
 def check_no_params(method):
-    if any(inspect.getargspec(method)):
+    if any(analyze_method(method)[:4]):
         raise CooperativeError, "Del has parameters."
 
 def check_all_params_are_keyword(method):
@@ -45,7 +71,7 @@ def check_all_params_are_keyword(method):
     named keyword parameter
     """
 
-    args, varargs, keywords, defaults = inspect.getargspec(method)
+    args, varargs, keywords, defaults, _ = analyze_method(method)
 
     # Always have self, thus the -1
     if len(args or []) - 1 != len(defaults or []):
@@ -57,7 +83,7 @@ def check_all_params_are_keyword(method):
         raise CooperativeError, "Init has variadic keyword parameters"
 
 def has_keywords(method):
-    return bool(inspect.getargspec(method)[3])
+    return bool(analyze_method(method).defaults)
 
 def make_keyword_extractor(method):
     """
@@ -65,8 +91,7 @@ def make_keyword_extractor(method):
     dictionary 'keys' and returns them in a separate dictionary.
     """
 
-    args, _1, _2, defs = inspect.getargspec(method)
-    key_args = args[-len(defs or []):]
+    key_args = analyze_method(method).key_args
     def extractor(keys):
         new = {}
         for a in key_args:
@@ -76,6 +101,127 @@ def make_keyword_extractor(method):
         return new
     return extractor
 
+def is_all_keyword(method):
+    args, varargs, keywords, defaults, _ = analyze_method(method)
+    return not varargs and not keywords and \
+           len(args) - 1 == len(defaults or ())
+
+_direct_callable = (types.FunctionType, type(object.__init__))
+
+def make_next_resolver(cls, method_name):
+    """
+    Returns a function that takes a concrete class and returns a
+    callable that invokes the implementation of 'method_name' that
+    follows 'cls' in the MRO of that class, taking the instance as
+    first parameter. Results are cached per concrete class.
+    """
+
+    cache = {}
+    def resolve(concrete):
+        mro = concrete.__mro__
+        for base in mro[mro.index(cls) + 1:]:
+            if method_name in base.__dict__:
+                value = base.__dict__[method_name]
+                break
+        else:
+            raise AttributeError, \
+                  "'super' object has no attribute '" + method_name + "'"
+
+        if isinstance(value, _direct_callable):
+            next_fn = value
+        else:
+            next_fn = lambda self, *a, **k: \
+                getattr(super(cls, self), method_name)(*a, **k)
+        cache[concrete] = next_fn
+        return next_fn
+    return cache, resolve
+
+_generated_template = """\
+def %(name)s(_coop_self%(params)s, **_coop_rest):
+    try:
+        _coop_next = _coop_cache[_coop_self.__class__]
+    except KeyError:
+        _coop_next = _coop_resolve(_coop_self.__class__)
+%(body)s
+"""
+
+_generated_pre = """\
+%(fixed)s    _coop_next(_coop_self, **_coop_rest)
+    return _coop_method(_coop_self%(args)s)
+"""
+
+_generated_post = """\
+    _coop_method(_coop_self%(args)s)
+%(fixed)s    return _coop_next(_coop_self, **_coop_rest)
+"""
+
+def make_generated_wrapper(cls, method,
+                           fixed_keywords = {},
+                           post_cooperate = False):
+    """
+    Returns a cooperative wrapper for 'method', whose parameters must
+    all be keywords, generated with an explicit parameter list. This
+    avoids extracting the keywords of the method on every call, and
+    the next method in the MRO is only looked up once per concrete
+    class. Unlike the generic wrappers, positional arguments are
+    bound to the parameters of 'method' and not passed along.
+    """
+
+    method_name = method.__name__
+    key_args = analyze_method(method).key_args
+    defaults = analyze_method(method).defaults or ()
+
+    cache, resolve = make_next_resolver(cls, method_name)
+    namespace = {
+        '_coop_method':  method,
+        '_coop_cache':   cache,
+        '_coop_resolve': resolve,
+        '_coop_fixed':   dict(fixed_keywords),
+        }
+    for i, default in enumerate(defaults):
+        namespace['_coop_default%d' % i] = default
+
+    body = _generated_post if post_cooperate else _generated_pre
+    code = _generated_template % {
+        'name':   method_name,
+        'params': ''.join(', %s=_coop_default%d' % (arg, i)
+                          for i, arg in enumerate(key_args)),
+        'body':   body % {
+            'args':  ''.join(', %s=%s' % (arg, arg) for arg in key_args),
+            'fixed': '    _coop_rest.update(_coop_fixed)\n'
+                     if fixed_keywords else '',
+            },
+        }
+    exec compile(code, '<cooperative %s.%s>' % (cls.__name__, method_name),
+                 'exec') in namespace
+
+    wrapper = wraps(method)(namespace[method_name])
+    wrapper.__objclass__ = cls
+    wrapper._cooperative_original = method
+    wrapper._cooperative_mode     = 'post' if post_cooperate else 'pre'
+    wrapper._cooperative_fixed    = dict(fixed_keywords)
+    return wrapper
+
+class _Continuation(object):
+    """
+    The 'next_method' passed to inner cooperating methods. A new one
+    is made on every call, so the number of calls is counted without
+    sharing any state between threads or reentrant calls.
+    """
+
+    __slots__ = ('next_fn', 'args', 'keywords', 'calls')
+
+    def __init__(self, next_fn, args, keywords):
+        self.next_fn  = next_fn
+        self.args     = args
+        self.keywords = keywords
+        self.calls    = 0
+
+    def __call__(self, **kws):
+        self.calls += 1
+        self.keywords.update(kws)
+        return self.next_fn(*self.args, **self.keywords)
+
 def decorate_cooperating(cls, method,
                          fixed_keywords  = {},
                          post_cooperate  = False,
@@ -92,6 +238,11 @@ def decorate_cooperating(cls, method,
     if method_name == '__del__':
         check_no_params(method)
 
+    if getattr(type(cls), '_cooperative_generate_wrappers', False) and \
+           not inner_cooperate and is_all_keyword(method):
+        return make_generated_wrapper(cls, method, fixed_keywords,
+                                      post_cooperate)
+
     extractor = make_keyword_extractor(method)
 
     if post_cooperate:
@@ -110,19 +261,13 @@ def decorate_cooperating(cls, method,
         assert not fixed_keywords
         # TODO: Maybe disregard this check for the sake of
         # performance or some other patterns.
-        inner_call_count = [0]
         def wrapper(self, *a, **orig):
             ours = extractor(orig)
-            orig.update(fixed_keywords)
-            next_fn = getattr(super(cls, self), method_name)
-            def next_method(**kws):
-                inner_call_count[0] += 1
-                orig.update(kws)
-                next_fn(*a, **orig)
+            next_method = _Continuation(
+                getattr(super(cls, self), method_name), a, orig)
             result = method(self, next_method, *a, **ours)
-            if inner_call_count[0] != 1:
+            if next_method.calls != 1:
                 raise CooperativeError, "Next method must be called exactly once."
-            inner_call_count[0] = 0
             return result
 
     else:
@@ -139,6 +284,10 @@ def decorate_cooperating(cls, method,
 
     wrapper = wraps(method)(wrapper)
     wrapper.__objclass__ = cls
+    wrapper._cooperative_original = method
+    wrapper._cooperative_mode     = 'inner' if inner_cooperate else \
+                                    'post' if post_cooperate else 'pre'
+    wrapper._cooperative_fixed    = dict(fixed_keywords)
     return wrapper
 
 
@@ -227,12 +376,42 @@ def get_abstract_methods(cls):
                   cls.__dict__.itervalues())
 
 
+_roots = weakref.WeakKeyDictionary()
+
+def get_roots(cls, name):
+    """
+    Returns the set of root declarations of the cooperative method
+    'name' in 'cls' and its bases. Results are memoized per class
+    and name, so only call this for classes that are already
+    decorated.
+    """
+
+    try:
+        cache = _roots[cls]
+    except KeyError:
+        cache = _roots[cls] = {}
+    except TypeError:
+        cache = {}
+
+    try:
+        return cache[name]
+    except KeyError:
+        roots = frozenset().union(*(get_roots(base, name)
+                                    for base in cls.__bases__))
+        value = cls.__dict__.get(name)
+        if getattr(value, '_cooperative_is_root', False):
+            roots = roots | frozenset([value])
+        cache[name] = roots
+        return roots
+
 def check_single_root(cls, name):
     # TODO: Do full method override checking at least in debug mode.
-    basic = filter(lambda c: getattr(getattr(c, name, None),
-                                     '_cooperative_is_root', False),
-                   cls.__mro__)
-    if len(basic) > 1:
+    roots = frozenset().union(*(get_roots(base, name)
+                                for base in cls.__bases__))
+    value = cls.__dict__.get(name)
+    if getattr(value, '_cooperative_is_root', False):
+        roots = roots | frozenset([value])
+    if len(roots) > 1:
         raise CooperativeError, \
               "Cooperative method (" + name + ") has conflicting declarations."
 
@@ -296,3 +475,132 @@ class CooperativeMeta(type):
 class Cooperative(object):
     __metaclass__ = CooperativeMeta
 
+
+class InitPlan(object):
+    """
+    The sequence of calls made by the cooperative '__init__' of a
+    concrete class, computed from its MRO. 'route' maps every keyword
+    accepted by the class to the index of the level that takes it, or
+    None when a fixed keyword always overrides it. 'fixed' has the
+    fixed keywords that each level receives from the levels above and
+    'order' the indices of the levels in the order they are called.
+    """
+
+    __slots__ = ('methods', 'route', 'fixed', 'order')
+
+    def __init__(self, methods, route, fixed, order):
+        self.methods = methods
+        self.route   = route
+        self.fixed   = fixed
+        self.order   = order
+
+    def split(self, keywords):
+        """
+        Returns a list with the keywords for each level, or None if
+        the plan does not know some keyword.
+        """
+        route = self.route
+        args  = [dict(fixed) for fixed in self.fixed]
+        for name, value in keywords.iteritems():
+            try:
+                level = route[name]
+            except KeyError:
+                return None
+            if level is not None:
+                args[level][name] = value
+        return args
+
+    def call(self, obj, args):
+        """
+        Calls the levels on 'obj' with the result of 'split'.
+        """
+        methods = self.methods
+        for level in self.order:
+            methods[level](obj, **args[level])
+
+def make_init_plan(cls):
+    """
+    Returns the InitPlan of 'cls', or None when its construction can
+    not be planned. That is the case when any class in the MRO
+    defines '__new__' or an '__init__' that is not a 'cooperate' or
+    'post_cooperate' wrapper.
+    """
+
+    levels = []
+    for base in cls.__mro__[:-1]:
+        if '__new__' in base.__dict__:
+            return None
+        init = base.__dict__.get('__init__')
+        if init is not None:
+            if getattr(init, '_cooperative_mode', None) not in ('pre', 'post'):
+                return None
+            levels.append(init)
+
+    methods = [ init._cooperative_original for init in levels ]
+    route   = {}
+    fixed   = [ {} for init in levels ]
+    for index, init in enumerate(levels):
+        for name in analyze_method(init._cooperative_original).key_args:
+            route.setdefault(name, index)
+    for index, init in enumerate(levels):
+        for name, value in init._cooperative_fixed.iteritems():
+            target = [ i for i in xrange(index + 1, len(levels))
+                       if name in analyze_method(methods[i]).key_args ]
+            if not target:
+                return None
+            fixed[target[0]][name] = value
+            if route.get(name, -1) > index:
+                route[name] = None
+
+    order = []
+    for index in reversed(xrange(len(levels))):
+        if levels[index]._cooperative_mode == 'pre':
+            order.append(index)
+        else:
+            order.insert(0, index)
+
+    return InitPlan(methods, route, fixed, order)
+
+class PlannedCooperativeMeta(CooperativeMeta):
+    """
+    A CooperativeMeta whose classes are constructed following an
+    InitPlan, built the first time each class is instantiated. The
+    plan calls the original '__init__' methods directly, without
+    going through the wrappers. Calls that the plan does not cover,
+    like those with positional parameters or unknown keywords, and
+    classes that can not be planned use the wrappers as usual, so
+    they fail with the same errors.
+    """
+
+    def __call__(cls, *a, **k):
+        try:
+            plan = cls.__dict__['_cooperative_init_plan']
+        except KeyError:
+            plan = make_init_plan(cls)
+            type.__setattr__(cls, '_cooperative_init_plan', plan)
+
+        if plan is not None and not a:
+            args = plan.split(k)
+            if args is not None:
+                obj = cls.__new__(cls)
+                plan.call(obj, args)
+                return obj
+        return super(PlannedCooperativeMeta, cls).__call__(*a, **k)
+
+class PlannedCooperative(Cooperative):
+    __metaclass__ = PlannedCooperativeMeta
+
+class GeneratedCooperativeMeta(CooperativeMeta):
+    """
+    A CooperativeMeta whose classes use wrappers generated
+    specifically for each method whose parameters are all keywords,
+    see 'make_generated_wrapper'. Those wrappers bind positional
+    arguments to the parameters of the method instead of passing
+    them along, so this only affects the hierarchies that opt in.
+    """
+
+    _cooperative_generate_wrappers = True
+
+class GeneratedCooperative(Cooperative):
+    __metaclass__ = GeneratedCooperativeMeta
+
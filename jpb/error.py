@@ -31,6 +31,7 @@ Provides some error base clases to be used in all the project.
 """
 
 from log import *
+from log_ring import dump_ring_buffers
 
 class LoggableError (Exception):
 
@@ -45,13 +46,15 @@ class LoggableError (Exception):
         self._message = self.MESSAGE if message is None else message
         self.level    = self.LEVEL   if level   is None else level
 
-    def log (self, level = None, msg = None):
+    def log (self, level = None, msg = None, *args):
         if msg is None:
             msg = self.message
         if level is None:
             level = self.level
 
-        log (self.__class__.__module__, level, msg)
+        log (self.__class__.__module__, level, msg, *args)
+        if level >= LOG_FATAL:
+            dump_ring_buffers ()
 
     def get_code (self):
         return self.ERROR_CODE
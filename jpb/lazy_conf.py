@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+#
+#  File:       lazy_conf.py
+#  Author:     Juan Pedro Bolívar Puente <raskolnikov@es.gnu.org>
+#  Date:       Mon Oct 19 10:12:40 2026
+#  Time-stamp: <2026-10-19 10:12:40 jbo>
+#
+
+#
+#  Copyright (C) 2012 Juan Pedro Bolívar Puente
+#
+#  This file is part of jpblib.
+#
+#  jpblib is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  jpblib is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Lazy configuration trees backed by a memory-mapped snapshot file.
+
+A snapshot is a compact binary image of a ConfNode tree. Loading it
+with 'load_conf_snapshot' returns a LazyConfNode that only creates
+the nodes of the tree when they are first accessed. Untouched
+subtrees stay in the file as mere offsets.
+
+File layout (all integers are little-endian unsigned 32 bits):
+
+  - Header: the MAGIC string, the offset of the root record, the
+    length of the root name and the root name itself.
+
+  - Node record: the length of the marshalled value, the marshalled
+    value, the number of childs and a table with one (name offset,
+    name length, record offset) entry per child, sorted by name so
+    lookups can use binary search.
+
+Values are stored with 'marshal', whose format is only guaranteed to
+be readable by the Python version that wrote it. Snapshots are meant
+as a cache to speed up loading, not as a portable format: regenerate
+them from the original configuration after upgrading Python.
+"""
+
+import mmap
+import marshal
+import struct
+
+from conf import ConfNode, ConfError
+
+MAGIC = 'JPBCONF\x01'
+
+_uint  = struct.Struct ('<I')
+_entry = struct.Struct ('<III')
+
+
+class ConfSnapshotError (ConfError):
+    pass
+
+
+def save_conf_snapshot (node, fname):
+    """
+    Writes the subtree rooted at 'node' into a snapshot file named
+    'fname' that can be later loaded with 'load_conf_snapshot'.
+    """
+
+    fh = open (fname, 'wb')
+    try:
+        name = str (node.get_name ())
+        fh.write (MAGIC)
+        fh.write (_uint.pack (0))
+        fh.write (_uint.pack (len (name)))
+        fh.write (name)
+        root = _write_node (fh, node)
+        fh.seek (len (MAGIC))
+        fh.write (_uint.pack (root))
+    finally:
+        fh.close ()
+
+
+def load_conf_snapshot (fname, cls = None):
+    """
+    Opens the snapshot file 'fname' and returns the root of its
+    configuration tree as an instance of 'cls', which is LazyConfNode
+    by default.
+    """
+
+    snapshot = MmapConfFile (fname)
+    node = (cls or LazyConfNode) (snapshot = snapshot,
+                                  offset   = snapshot.root_offset)
+    node.rename (snapshot.root_name)
+    return node
+
+
+def _write_node (fh, node):
+    entries = []
+    for child in node.childs ():
+        entries.append ((str (child.get_name ()), _write_node (fh, child)))
+    entries.sort ()
+
+    table = []
+    for name, offset in entries:
+        table.append (_entry.pack (fh.tell (), len (name), offset))
+        fh.write (name)
+
+    try:
+        value = marshal.dumps (node.value)
+    except ValueError:
+        raise ConfSnapshotError ('Can not store value of type ' +
+                                 node.value.__class__.__name__)
+
+    offset = fh.tell ()
+    fh.write (_uint.pack (len (value)))
+    fh.write (value)
+    fh.write (_uint.pack (len (table)))
+    fh.write (''.join (table))
+    return offset
+
+
+class MmapConfFile (object):
+    """
+    Read-only access to the records of a memory-mapped snapshot
+    file. Nodes are identified by the offset of their record.
+    """
+
+    def __init__ (self, fname):
+        fh = open (fname, 'rb')
+        try:
+            self._map = mmap.mmap (fh.fileno (), 0, access = mmap.ACCESS_READ)
+        finally:
+            fh.close ()
+
+        if self._map [:len (MAGIC)] != MAGIC:
+            raise ConfSnapshotError ('Not a configuration snapshot: ' + fname)
+
+        start = len (MAGIC)
+        self.root_offset, = _uint.unpack_from (self._map, start)
+        name_len, = _uint.unpack_from (self._map, start + _uint.size)
+        start += 2 * _uint.size
+        self.root_name = self._map [start : start + name_len]
+
+    def close (self):
+        self._map.close ()
+
+    def value (self, offset):
+        """
+        Returns the value stored in the record at 'offset'.
+        """
+        size, = _uint.unpack_from (self._map, offset)
+        start = offset + _uint.size
+        return marshal.loads (self._map [start : start + size])
+
+    def find_child (self, offset, name):
+        """
+        Returns the offset of the record of the child named 'name' of
+        the record at 'offset', or None if there is no such child.
+        """
+
+        table, count = self._table (offset)
+        low, high = 0, count
+        while low < high:
+            mid = (low + high) // 2
+            name_off, name_len, child_off = \
+                _entry.unpack_from (self._map, table + mid * _entry.size)
+            mid_name = self._map [name_off : name_off + name_len]
+            if mid_name < name:
+                low = mid + 1
+            elif mid_name > name:
+                high = mid
+            else:
+                return child_off
+        return None
+
+    def child_entries (self, offset):
+        """
+        Returns a list of (name, offset) pairs with the childs of the
+        record at 'offset'.
+        """
+
+        table, count = self._table (offset)
+        result = []
+        for i in xrange (count):
+            name_off, name_len, child_off = \
+                _entry.unpack_from (self._map, table + i * _entry.size)
+            result.append ((self._map [name_off : name_off + name_len],
+                            child_off))
+        return result
+
+    def _table (self, offset):
+        size, = _uint.unpack_from (self._map, offset)
+        offset += _uint.size + size
+        count, = _uint.unpack_from (self._map, offset)
+        return offset + _uint.size, count
+
+
+class _ClosedConfFile (object):
+    """
+    Stands for the snapshot file of the nodes that still had childs
+    to load when their tree was closed.
+    """
+
+    def _closed (self, *a):
+        raise ConfSnapshotError ('The configuration snapshot was closed')
+
+    value = find_child = child_entries = _closed
+
+_closed_file = _ClosedConfFile ()
+
+
+class LazyConfNode (ConfNode):
+    """
+    A ConfNode whose childs are loaded on demand from a snapshot
+    file. Nodes are only created when accessed through 'child',
+    'path' or 'childs'. Once created they behave as normal ConfNode
+    objects, so writes go through the normal backend. Removing or
+    renaming childs promotes the parent, creating all its direct
+    childs and detaching it from the snapshot.
+
+    The 'snapshot' and 'offset' keyword parameters of the constructor
+    select the record of the node. Any other parameter is passed to
+    ConfNode.
+    """
+
+    def __init__ (self, *a, **k):
+        snapshot = k.pop ('snapshot', None)
+        offset   = k.pop ('offset', None)
+        self._snapshot = snapshot
+        self._snapshot_offset = offset
+        super (LazyConfNode, self).__init__ (*a, **k)
+        if snapshot is not None:
+            self._val = snapshot.value (offset)
+
+    def has_child (self, name):
+        return name in self._childs or \
+               (self._snapshot is not None and
+                self._snapshot.find_child (self._snapshot_offset,
+                                           name) is not None)
+
+    def childs (self):
+        self._materialize_childs ()
+        return super (LazyConfNode, self).childs ()
+
+    def to_dict (self):
+        self._materialize_childs ()
+        return super (LazyConfNode, self).to_dict ()
+
+    def remove (self, name):
+        self._promote ()
+        return super (LazyConfNode, self).remove (name)
+
+    def rename (self, name):
+        if isinstance (self._parent, LazyConfNode):
+            self._parent._promote ()
+        super (LazyConfNode, self).rename (name)
+
+    def close (self):
+        """
+        Closes the snapshot file of this tree, which should be called
+        on the node returned by 'load_conf_snapshot'. The nodes that
+        have been created stay usable. Nodes whose childs were all
+        created are detached from the file; in the rest, accessing a
+        child that was not created yet, or listing the childs, raises
+        ConfSnapshotError. Use 'childs' or 'to_dict' before closing
+        if the whole tree is needed.
+        """
+        files = set ()
+        for node in self.iter_preorder ():
+            snapshot = getattr (node, '_snapshot', None)
+            if snapshot is None or snapshot is _closed_file:
+                continue
+            files.add (snapshot)
+            if all (name in node._childs for name, offset in
+                    snapshot.child_entries (node._snapshot_offset)):
+                node._snapshot = None
+                node._snapshot_offset = None
+            else:
+                node._snapshot = _closed_file
+        for snapshot in files:
+            snapshot.close ()
+
+    def is_materialized (self):
+        """
+        Returns whether all the direct childs of this node have been
+        created already.
+        """
+        return self._snapshot is None
+
+    def _new_child (self, name):
+        if self._snapshot is not None:
+            offset = self._snapshot.find_child (self._snapshot_offset, name)
+            if offset is not None:
+                return self._materialize (name, offset)
+        return super (LazyConfNode, self)._new_child (name)
+
+    def _bulk_new_child (self, name):
+        if self._snapshot is not None:
+            offset = self._snapshot.find_child (self._snapshot_offset, name)
+            if offset is not None:
+                return self._materialize (name, offset)
+        return super (LazyConfNode, self)._bulk_new_child (name)
+
+    def _materialize (self, name, offset):
+        child = self.__class__ (snapshot = self._snapshot, offset = offset)
+        child._backend = self._backend
+        return self._link_child (child, name)
+
+    def _materialize_childs (self):
+        if self._snapshot is not None:
+            for name, offset in self._snapshot.child_entries (
+                self._snapshot_offset):
+                if name not in self._childs:
+                    self._materialize (name, offset)
+
+    def _promote (self):
+        self._materialize_childs ()
+        self._snapshot = None
+        self._snapshot_offset = None
+
+    name = property (ConfNode.get_name, rename)
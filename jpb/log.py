@@ -34,9 +34,14 @@ It also defines the following log levels:
 """
 
 from connection import Trackable
-from observer import make_observer
+from observer import make_observer, _ObserverSignal
 from tree import AutoTree, AutoTreeTraits
 from singleton import Singleton
+from util import lazyprop
+from thread import get_ident
+from time import time as _now
+from random import random as _random
+import threading
 import sys
 
 LogSubject, LogListener = \
@@ -55,7 +60,155 @@ LOG_WARNING = 6,  "warning"
 LOG_INFO    = 4,  "info"
 LOG_DEBUG   = 2,  "debug"
 
-class StdLogListener (LogListener):
+_LEVEL_ALL  = -sys.maxint, ""
+_LEVEL_NONE = sys.maxint, ""
+
+_LEVEL_NAMES = dict ((level [1], level) for level in
+                     (LOG_FATAL, LOG_ERROR, LOG_WARNING, LOG_INFO, LOG_DEBUG))
+
+_level_generation = 0
+_level_lock = threading.Lock ()
+
+def _touch_levels ():
+    """
+    Invalidates the minimum levels cached in the log nodes. This is
+    called whenever a listener is connected or disconnected, a
+    listener level changes or a node is moved, always after the
+    change is made: a node that recomputes its level in between
+    stamps it with the previous generation, so it is computed again.
+    """
+    global _level_generation
+    with _level_lock:
+        _level_generation += 1
+
+
+def format_message (path_name, level, msg):
+    """
+    Returns the line that StdLogListener and similar listeners write
+    for a message 'msg' with the given 'level' that was logged in the
+    node named 'path_name'.
+    """
+    return '[' + path_name + '] ' + level[1].upper () + ': ' + msg + '\n'
+
+
+# Types of the arguments that a message can keep unformatted. They
+# are immutable, so formatting them later gives the same text, and
+# BinaryLogListener knows how to store them.
+_DEFERRABLE_TYPES = frozenset ((int, long, float, bool, str, unicode,
+                                type (None)))
+
+class LogMessage (object):
+    """
+    A message that has not been formatted yet, made of the format
+    string 'fmt' and its arguments 'args'. It is what listeners
+    derived from RecordLogListener receive instead of the text when
+    no other listener needs it.
+    """
+
+    __slots__ = ('fmt', 'args')
+
+    def __init__ (self, fmt, args):
+        self.fmt  = fmt
+        self.args = args
+
+
+class LogRecord (object):
+    """
+    Structured representation of a logged message, carrying the path
+    name of the node where it was logged, its level, the message, the
+    time when it was logged and the identifier of the logging thread.
+    Listeners that store or forward the messages can keep records and
+    build the output line later with 'format'. The message is kept
+    as the format string 'fmt' and its arguments 'args', so the text
+    'msg' is only built when it is read.
+    """
+
+    __slots__ = ('path', 'level', 'fmt', 'args', 'time', 'thread')
+
+    def __init__ (self, path, level, msg, time = None, thread = None,
+                  args = ()):
+        self.path   = path
+        self.level  = level
+        self.fmt    = msg
+        self.args   = args
+        self.time   = _now () if time is None else time
+        self.thread = get_ident () if thread is None else thread
+
+    @classmethod
+    def from_message (cls, node, level, msg):
+        """
+        Returns a record for the message received by the
+        'on_message' method of a listener, which may be a LogMessage.
+        """
+        if isinstance (msg, LogMessage):
+            return cls (node.get_path_name (), level, msg.fmt,
+                        args = msg.args)
+        return cls (node.get_path_name (), level, msg)
+
+    def get_msg (self):
+        if self.args:
+            return self.fmt % self.args
+        return self.fmt
+
+    def format (self):
+        """
+        Returns the record formatted with 'format_message'.
+        """
+        return format_message (self.path, self.level, self.get_msg ())
+
+    def __getstate__ (self):
+        return (self.path, self.level, self.fmt, self.time, self.thread,
+                self.args)
+
+    def __setstate__ (self, state):
+        self.path, self.level, self.fmt, self.time, self.thread, \
+                   self.args = state
+
+    msg = property (get_msg)
+
+
+class LevelLogListener (LogListener):
+    """
+    This is a log listener that is only interested in the messages
+    over a given level. Log nodes use the 'level' of the listeners
+    connected to them and their parents to discard the messages that
+    no one would listen to as soon as they are logged. Other log
+    listeners are assumed to be interested in every message.
+    """
+
+    def __init__ (self, level = LOG_INFO, *a, **k):
+        """
+        Constructor.
+
+        Parameters:
+          - level: The cut-off level. By default this is LOG_INFO.
+        """
+        super (LevelLogListener, self).__init__ (*a, **k)
+        self._level = level
+
+    def get_level (self):
+        return self._level
+
+    def set_level (self, level):
+        self._level = level
+        _touch_levels ()
+
+    level = property (get_level, set_level)
+
+
+class RecordLogListener (LevelLogListener):
+    """
+    Base class for the listeners that keep the messages as LogRecord
+    objects and do not need their text right away. When every
+    listener that accepts a message logged with arguments derives
+    from this class, and the arguments are simple immutable values,
+    the message is not formatted in the logging thread: 'on_message'
+    receives a LogMessage instead of the text. Use
+    'LogRecord.from_message' to handle both.
+    """
+
+
+class StdLogListener (LevelLogListener):
     """
     This is a log listener that outputs all the messages to the given
     files. It can filter the messages below a given log level.
@@ -80,8 +233,7 @@ class StdLogListener (LogListener):
             this is sys.stderr.
         """
 
-        super (StdLogListener, self).__init__ (*a, **k)
-        self.level = level
+        super (StdLogListener, self).__init__ (level, *a, **k)
         self.info_output = info_out
         self.error_output = error_out
 
@@ -91,12 +243,113 @@ class StdLogListener (LogListener):
         """
         if level >= self.level:
             out = self.info_output if level <= LOG_INFO else self.error_output
-            out.write ('[' + node.get_path_name () + '] ' +
-                       level[1].upper () + ': '
-                       + msg + '\n')
+            out.write (format_message (node.get_path_name (), level, msg))
 
 
-class LogNode (AutoTree, LogSubject):
+class LogLimiter (object):
+    """
+    Token bucket rate limiter with duplicate suppression for the
+    messages of a LogNode. See 'LogNode.set_limits'.
+    """
+
+    REPEATED_MESSAGE   = "Last message repeated %d times"
+    SUPPRESSED_MESSAGE = "%d messages suppressed by rate limit"
+
+    def __init__ (self, rate = None, burst = None,
+                  suppress_duplicates = False):
+        self.rate  = rate
+        self.burst = burst or rate
+        self.suppress_duplicates = suppress_duplicates
+
+        self._lock     = threading.Lock ()
+        self._tokens   = self.burst
+        self._time     = _now ()
+        self._last     = None
+        self._repeated = 0
+        self._dropped  = 0
+
+    def admit (self, node, level, msg, args):
+        """
+        Returns whether the message should be logged. Pending
+        summaries of the dropped messages are logged directly in
+        'node' before returning True.
+        """
+
+        pending = []
+        with self._lock:
+            message = None
+            if self.suppress_duplicates:
+                # Messages computed by a callable can not be compared
+                # before formatting them, so they are never repeated.
+                if not callable (msg) or args:
+                    message = (level, msg, args)
+                if message is not None and message == self._last:
+                    self._repeated += 1
+                    return False
+
+            if self.rate:
+                now = _now ()
+                self._tokens = min (self.burst, self._tokens +
+                                    (now - self._time) * self.rate)
+                self._time = now
+                if self._tokens < 1:
+                    # Dropped messages do not count as the last one
+                    # logged, so they do not end a run of repeats.
+                    self._dropped += 1
+                    return False
+                self._tokens -= 1
+
+            if self.suppress_duplicates:
+                if self._repeated:
+                    pending.append ((self._last [0], self.REPEATED_MESSAGE %
+                                     self._repeated))
+                    self._repeated = 0
+                self._last = message
+            if self._dropped:
+                pending.append ((LOG_WARNING, self.SUPPRESSED_MESSAGE %
+                                 self._dropped))
+                self._dropped = 0
+
+        for summary_level, summary in pending:
+            node._dispatch (summary_level, summary)
+        return True
+
+
+class _LevelTracking (object):
+    """
+    Mixin for the log containers that invalidates the cached minimum
+    levels whenever their connections change.
+    """
+
+    def connect (self, destiny):
+        result = super (_LevelTracking, self).connect (destiny)
+        _touch_levels ()
+        return result
+
+    def disconnect (self, destiny):
+        super (_LevelTracking, self).disconnect (destiny)
+        _touch_levels ()
+
+    def disconnect_if (self, predicate):
+        super (_LevelTracking, self).disconnect_if (predicate)
+        _touch_levels ()
+
+    def clear (self):
+        super (_LevelTracking, self).clear ()
+        _touch_levels ()
+
+
+class _LogSignal (_LevelTracking, _ObserverSignal):
+    pass
+
+def _make_log_signal (obj):
+    sig = _LogSignal ()
+    sig._observer_signal_obj  = obj
+    sig._observer_signal_name = 'on_message'
+    return sig
+
+
+class LogNode (_LevelTracking, AutoTree, LogSubject):
     """
     This represents a node of a hierarchical log, and it is a log by
     itself. Note that when a message is logged in a node, it also
@@ -108,44 +361,200 @@ class LogNode (AutoTree, LogSubject):
     root LogNode of the hierarchy.
     """
 
+    on_message = lazyprop (_make_log_signal, 'on_message')
+
     def __init__ (self, *a, **k):
         """ Constructor. """
         super (LogNode, self).__init__ (*a, **k)
+        self._min_level = _LEVEL_NONE
+        self._min_level_generation = None
+        self._listen_level = _LEVEL_NONE
+        self._text_level = _LEVEL_NONE
+        self._policy_level = None
+        self._policy_sampling = None
+        self._level = None
+        self._sampling = None
+        self._limiter = None
+
+    def is_logging (self, level):
+        """
+        Returns whether a message with the given 'level' logged in
+        this node would reach any listener of this node or its
+        parents.
+        """
+        if self._min_level_generation != _level_generation:
+            self._update_min_level ()
+        return level >= self._min_level
 
-    def log (self, level, msg):
+    def log (self, level, msg, *args):
         """
         This logs a message. When a message is logged, this invokes
         the 'on_message' signal on this log and all the parents of
-        this log.
+        this log, unless no listener is interested in messages of
+        that level.
+
+        The message is only formatted when some listener may accept
+        it, and it is formatted only once for all of them. When only
+        record listeners accept it, it is not formatted at all (see
+        RecordLogListener).
 
         Parameters:
           - level: Level of importance of this message.
-          - msg: Message to be sent to be logged.
+          - msg: Message to be sent to be logged. If 'args' are
+            given, it is used as a format string with them.
+            Otherwise, if it is callable, it is called without
+            parameters and the result is used as the message.
         """
+        if self._min_level_generation != _level_generation:
+            self._update_min_level ()
+        if level < self._min_level:
+            return
+        if self._sampling is not None and _random () >= self._sampling:
+            return
+        if self._limiter is not None and \
+               not self._limiter.admit (self, level, msg, args):
+            return
+
+        if args:
+            if level >= self._text_level or \
+                   not _DEFERRABLE_TYPES.issuperset (map (type, args)):
+                msg = msg % args
+            else:
+                msg = LogMessage (msg, args)
+        elif callable (msg):
+            msg = msg ()
+
+        self._dispatch (level, msg)
+
+    def set_level (self, level):
+        """
+        Sets the minimum level of the messages logged in this node and
+        its childs, on top of the level of the listeners. The setting
+        of the nearest node up in the hierarchy applies, so a child can
+        be more or less verbose than its parent. Pass None to inherit
+        the level of the parent again.
+        """
+        self._policy_level = level
+        _touch_levels ()
+
+    def set_sampling (self, rate):
+        """
+        Only logs a random fraction 'rate', between 0 and 1, of the
+        messages logged in this node and its childs. As with
+        'set_level', the nearest setting up in the hierarchy
+        applies. Pass None to inherit the sampling of the parent
+        again.
+        """
+        self._policy_sampling = rate
+        _touch_levels ()
+
+    def set_limits (self, rate = None, burst = None,
+                    suppress_duplicates = False):
+        """
+        Limits the messages logged in this node, which are dropped
+        before reaching any listener. Messages logged in the childs of
+        this node are not affected.
+
+        Parameters:
+          - rate: Maximum number of messages per second, on average.
+          - burst: Maximum number of messages that can be logged at
+            once after a quiet period. By default, the same as 'rate'.
+          - suppress_duplicates: If True, a message identical to the
+            previous one is not logged again. Instead, a summary is
+            logged before the next different message. Messages given
+            as a callable are never considered repeated.
+
+        When called without parameters, the limits are removed.
+        """
+        if rate or suppress_duplicates:
+            self._limiter = LogLimiter (rate, burst, suppress_duplicates)
+        else:
+            self._limiter = None
+
+    def _dispatch (self, level, msg):
         curr = self
         while curr:
             curr.on_message (self, level, msg)
             curr = curr.parent ()
 
-    def info (self, msg):
+    def info (self, msg, *args):
         """ Logs a message with LOG_INFO level. """
-        self.log (LOG_INFO, msg)
+        self.log (LOG_INFO, msg, *args)
 
-    def warning (self, msg):
+    def warning (self, msg, *args):
         """ Logs a message with LOG_WARNING level. """
-        self.log (LOG_WARNING, msg)
+        self.log (LOG_WARNING, msg, *args)
 
-    def error (self, msg):
+    def error (self, msg, *args):
         """ Logs a message with LOG_ERROR level. """
-        self.log (LOG_ERROR, msg)
+        self.log (LOG_ERROR, msg, *args)
 
-    def fatal (self, msg):
+    def fatal (self, msg, *args):
         """ Logs a message with LOG_FATAL level. """
-        self.log (LOG_FATAL, msg)
+        self.log (LOG_FATAL, msg, *args)
 
-    def debug (self, msg):
+    def debug (self, msg, *args):
         """ Logs a message with LOG_DEBUG level. """
-        self.log (LOG_DEBUG, msg)
+        self.log (LOG_DEBUG, msg, *args)
+
+    def remove (self, name):
+        child = super (LogNode, self).remove (name)
+        _touch_levels ()
+        return child
+
+    def _handle_tree_new_child (self, child):
+        _touch_levels ()
+
+    def _update_min_level (self):
+        generation = _level_generation
+        stale = []
+        node = self
+        while node is not None and \
+                  node._min_level_generation != generation:
+            stale.append (node)
+            node = node._parent
+
+        for node in reversed (stale):
+            parent = node._parent
+            listen, text = node._listening_level ()
+            policy = node._policy_level
+            sampling = node._policy_sampling
+            if parent is not None:
+                listen = min (listen, parent._listen_level)
+                text = min (text, parent._text_level)
+                if policy is None:
+                    policy = parent._level
+                if sampling is None:
+                    sampling = parent._sampling
+            node._listen_level = listen
+            node._text_level = text
+            node._level = policy
+            node._sampling = sampling \
+                if sampling is not None and sampling < 1 else None
+            node._min_level = listen if policy is None \
+                else max (listen, policy)
+            node._min_level_generation = generation
+
+    def _listening_level (self):
+        """
+        Returns the minimum level of the listeners of this node and
+        the minimum level of those that need the text of the
+        messages.
+        """
+        level = text = _LEVEL_NONE
+        for dest in self._destinies:
+            if isinstance (dest, RecordLogListener):
+                level = min (level, dest.level)
+            elif isinstance (dest, LevelLogListener):
+                level = min (level, dest.level)
+                text = min (text, dest.level)
+            else:
+                return _LEVEL_ALL, _LEVEL_ALL
+
+        signal = self.__dict__.get ('on_message')
+        if signal is not None and signal.count:
+            return _LEVEL_ALL, _LEVEL_ALL
+        return level, text
 
 
 class GlobalLog (LogNode):
@@ -164,16 +573,89 @@ class GlobalLog (LogNode):
         super (GlobalLog, self).__init__ (auto_tree_traits = GlobalLog.Traits)
 
 
-def log (path, level, msg):
+def log (path, level, msg, *args):
     """
     Logs a message into the global logger.
 
     Parameters:
       - path: Node of the global log where to register the message.
       - level: Importance of the registered message.
-      - msg: Message to register.
+      - msg: Message to register, formatted lazily as described in
+        'LogNode.log'.
+    """
+    GlobalLog ().path (path).log (level, msg, *args)
+
+
+def set_log_level (path, level):
     """
-    GlobalLog ().path (path).log (level, msg)
+    Sets the level of the node of the global log at 'path' and all
+    its childs, as described in 'LogNode.set_level'. A trailing '.*'
+    in the path is ignored, so 'db.*' and 'db' are equivalent, and
+    an empty path or '*' refer to the whole log.
+    """
+    _policy_node (path).set_level (level)
+
+
+def set_log_sampling (path, rate):
+    """
+    Sets the sampling rate of the node of the global log at 'path'
+    and all its childs, as described in 'LogNode.set_sampling'. The
+    path is interpreted as in 'set_log_level'.
+    """
+    _policy_node (path).set_sampling (rate)
+
+
+def _policy_node (path, log = None):
+    if log is None:
+        log = GlobalLog ()
+    if path.endswith ('*'):
+        path = path [:-1].rstrip ('.')
+    return log.path (path) if path else log
+
+
+def configure_log (conf, log = None):
+    """
+    Applies the log settings found in the configuration node 'conf'
+    to the log node 'log', the GlobalLog by default. The settings of
+    each log node are read from the configuration node with the same
+    relative path under 'conf', from these childs:
+
+      - rate_limit, rate_burst, suppress_duplicates: Parameters of
+        'LogNode.set_limits'.
+      - level: Name of the level for 'LogNode.set_level'.
+      - sampling: Rate for 'LogNode.set_sampling'.
+    """
+
+    if log is None:
+        log = GlobalLog ()
+
+    base = len (conf.get_path_list ())
+    for node in conf.iter_preorder ():
+        if node.get_name () in _LOG_CONF_KEYS and node is not conf:
+            continue
+
+        get = lambda key: node.child (key).value \
+              if node.has_child (key) else None
+        rate  = get ('rate_limit')
+        burst = get ('rate_burst')
+        dups  = get ('suppress_duplicates')
+        level    = get ('level')
+        sampling = get ('sampling')
+
+        if rate is None and dups is None and \
+               level is None and sampling is None:
+            continue
+
+        target = _policy_node ('.'.join (node.get_path_list () [base:]), log)
+        if rate is not None or dups is not None:
+            target.set_limits (rate, burst, bool (dups))
+        if level is not None:
+            target.set_level (_LEVEL_NAMES [level.lower ()])
+        if sampling is not None:
+            target.set_sampling (sampling)
+
+_LOG_CONF_KEYS = ('rate_limit', 'rate_burst', 'suppress_duplicates',
+                  'level', 'sampling')
 
 
 def get_log (path):
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+#
+#  File:       log_async.py
+#  Author:     Juan Pedro Bolívar Puente <raskolnikov@es.gnu.org>
+#  Date:       Mon Oct 19 11:32:07 2026
+#  Time-stamp: <2026-10-19 11:32:07 jbo>
+#
+
+#
+#  Copyright (C) 2012 Juan Pedro Bolívar Puente
+#
+#  This file is part of jpblib.
+#
+#  jpblib is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  jpblib is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Asynchronous log listeners.
+
+The listeners in this module only queue the messages in the thread
+that logs them. A background thread takes them from the queue,
+formats them in batches and writes them in large chunks.
+"""
+
+from log import LevelLogListener, LOG_INFO, format_message
+from Queue import Queue, Empty, Full
+import threading
+import sys
+
+LOG_QUEUE_BLOCK = 'block'
+LOG_QUEUE_DROP  = 'drop'
+
+_STOP = object ()
+
+
+class AsyncLogListener (LevelLogListener):
+    """
+    This is a log listener that writes the messages to the given
+    files like StdLogListener, but from a background writer thread.
+    Call 'flush' to wait until every queued message is written and
+    'close' to stop the writer thread.
+    """
+
+    def __init__ (self,
+                  level = LOG_INFO,
+                  info_out = sys.stdout,
+                  error_out = sys.stderr,
+                  capacity = 1 << 16,
+                  policy = LOG_QUEUE_BLOCK,
+                  batch_size = 1024,
+                  *a, **k):
+        """
+        Constructor.
+
+        Parameters:
+          - level, info_out, error_out: Same as in StdLogListener.
+          - capacity: Maximum number of messages waiting to be
+            written. When 0 the queue is unbounded.
+          - policy: What to do when the queue is full. With
+            LOG_QUEUE_BLOCK, the default, the logging thread waits for
+            the writer. With LOG_QUEUE_DROP the message is discarded
+            and counted in 'dropped'.
+          - batch_size: Maximum number of messages written at once.
+        """
+
+        super (AsyncLogListener, self).__init__ (level, *a, **k)
+        self.info_output  = info_out
+        self.error_output = error_out
+        self.policy       = policy
+        self.batch_size   = batch_size
+        self.dropped      = 0
+        self.errors       = 0
+
+        self._closed = False
+        self._lock   = threading.Lock ()
+        self._queue  = Queue (capacity)
+        self._thread = threading.Thread (target = self._run,
+                                         name = 'AsyncLogListener')
+        self._thread.daemon = True
+        self._thread.start ()
+
+    def on_message (self, node, level, msg):
+        """
+        Queues the message to be written.
+        """
+        if level >= self._level and not self._closed:
+            record = (node.get_path_name (), level, msg)
+            # The lock keeps 'close' from queueing the stop mark
+            # between the check and the put, as nothing queued after
+            # it would ever be written and 'flush' would hang.
+            with self._lock:
+                if self._closed:
+                    return
+                if self.policy == LOG_QUEUE_DROP:
+                    try:
+                        self._queue.put_nowait (record)
+                    except Full:
+                        self.dropped += 1
+                else:
+                    self._queue.put (record)
+
+    def flush (self):
+        """
+        Waits until all the queued messages have been written.
+        """
+        self._queue.join ()
+
+    def close (self):
+        """
+        Writes all the queued messages and stops the writer
+        thread. Messages received afterwards are ignored.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put (_STOP)
+        self._thread.join ()
+
+    def _run (self):
+        queue = self._queue
+        running = True
+        while running:
+            records = [queue.get ()]
+            try:
+                while len (records) < self.batch_size:
+                    records.append (queue.get_nowait ())
+            except Empty:
+                pass
+
+            count = len (records)
+            if _STOP in records:
+                running = False
+                records = [r for r in records if r is not _STOP]
+            try:
+                self._write (records)
+            except Exception:
+                self.errors += 1
+            for i in xrange (count):
+                queue.task_done ()
+
+    def _write (self, records):
+        chunk = []
+        chunk_out = None
+        for path_name, level, msg in records:
+            out = self.info_output if level <= LOG_INFO else self.error_output
+            if out is not chunk_out:
+                if chunk:
+                    chunk_out.write (''.join (chunk))
+                    del chunk [:]
+                chunk_out = out
+            chunk.append (format_message (path_name, level, msg))
+        if chunk:
+            chunk_out.write (''.join (chunk))
+
+        self.info_output.flush ()
+        if self.error_output is not self.info_output:
+            self.error_output.flush ()
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+#
+#  File:       log_binary.py
+#  Author:     Juan Pedro Bolívar Puente <raskolnikov@es.gnu.org>
+#  Date:       Mon Oct 19 13:31:52 2026
+#  Time-stamp: <2026-10-19 13:31:52 jbo>
+#
+
+#
+#  Copyright (C) 2012 Juan Pedro Bolívar Puente
+#
+#  This file is part of jpblib.
+#
+#  jpblib is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  jpblib is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Compact binary log files.
+
+BinaryLogListener appends LogRecord objects to a binary file instead
+of writing formatted lines, and 'read_log_records' reads them back
+filtering by node path prefix and level. When run as a script this
+module prints the records of the given files:
+
+  python -m jpb.log_binary [-p PREFIX] [-l LEVEL] FILE...
+
+File layout (little-endian): the MAGIC string followed by a sequence
+of records, each starting with a one byte kind:
+
+  - PATH_RECORD: defines the path name for a path id from that point
+    of the file on. Holds the id (uint32), the name length (uint16)
+    and the name.
+
+  - LEVEL_RECORD: same for level ids. Holds the id (uint16), the
+    level number (int16), the name length (uint16) and the name.
+
+  - MESSAGE_RECORD: holds the path id (uint32), the level id
+    (uint16), the level number (int16), the time (double), the thread
+    id (uint64), the number of message arguments (uint16) and the
+    length of the data that follows (uint32). The data is the format
+    string of the message followed by its arguments, each one encoded
+    as a one byte type tag and its value: 'N' for None, 'B' for a
+    bool (uint8), 'q' for an int (int64), 'L' for any other integer
+    and 'd' for a float (double), 's' for a str and 'u' for a unicode
+    (UTF-8), the last three as their length (uint32) and bytes.
+    Readers can skip messages by looking at the fixed size header
+    only.
+
+The messages are stored unformatted when every listener that accepts
+them is a RecordLogListener, so formatting happens in the reader.
+"""
+
+from log import RecordLogListener, LogRecord, \
+     LOG_FATAL, LOG_ERROR, LOG_WARNING, LOG_INFO, LOG_DEBUG
+from arg_parser import ArgParser, OptionWith
+import threading
+import struct
+import os
+import sys
+
+MAGIC = 'JPBLOG\x00\x02'
+
+PATH_RECORD    = 'P'
+LEVEL_RECORD   = 'L'
+MESSAGE_RECORD = 'M'
+
+_path_header    = struct.Struct ('<cIH')
+_level_header   = struct.Struct ('<cHhH')
+_message_header = struct.Struct ('<cIHhdQHI')
+_uint   = struct.Struct ('<I')
+_int64  = struct.Struct ('<q')
+_double = struct.Struct ('<d')
+
+
+def _encode_value (chunks, value):
+    kind = type (value)
+    if value is None:
+        chunks.append ('N')
+    elif kind is bool:
+        chunks.append ('B\x01' if value else 'B\x00')
+    elif kind in (int, long):
+        if -(1 << 63) <= value < (1 << 63):
+            chunks.append ('q' + _int64.pack (value))
+        else:
+            data = str (value)
+            chunks.append ('L' + _uint.pack (len (data)) + data)
+    elif kind is float:
+        chunks.append ('d' + _double.pack (value))
+    else:
+        tag = 's'
+        if kind is unicode:
+            tag = 'u'
+            value = value.encode ('utf-8')
+        chunks.append (tag + _uint.pack (len (value)) + value)
+
+def _decode_value (data, offset):
+    tag = data [offset]
+    offset += 1
+    if tag == 'N':
+        return None, offset
+    elif tag == 'B':
+        return data [offset] != '\x00', offset + 1
+    elif tag == 'q':
+        return _int64.unpack_from (data, offset) [0], offset + _int64.size
+    elif tag == 'd':
+        return _double.unpack_from (data, offset) [0], offset + _double.size
+    size, = _uint.unpack_from (data, offset)
+    offset += _uint.size
+    value = data [offset : offset + size]
+    if tag == 'u':
+        value = value.decode ('utf-8')
+    elif tag == 'L':
+        value = long (value)
+    elif tag != 's':
+        raise IOError ('Corrupt message argument')
+    return value, offset + size
+
+
+class BinaryLogListener (RecordLogListener):
+    """
+    This is a log listener that appends all the messages over its
+    level to a binary log file.
+    """
+
+    def __init__ (self, fname, level = LOG_INFO, *a, **k):
+        """
+        Constructor.
+
+        Parameters:
+          - fname: Name of the file. If it exists, the new records
+            are appended to it.
+          - level: The cut-off level. By default this is LOG_INFO.
+        """
+
+        super (BinaryLogListener, self).__init__ (level, *a, **k)
+        self._lock   = threading.Lock ()
+        self._paths  = {}
+        self._levels = {}
+        self._fh = open (fname, 'ab')
+        if self._fh.tell () == 0:
+            self._fh.write (MAGIC)
+
+    def on_message (self, node, level, msg):
+        """
+        Writes the message into the file.
+        """
+        if level >= self._level:
+            self.write_record (LogRecord.from_message (node, level, msg))
+
+    def write_record (self, record):
+        """
+        Writes a LogRecord into the file.
+        """
+        chunks = []
+        _encode_value (chunks, record.fmt)
+        for arg in record.args:
+            _encode_value (chunks, arg)
+        data = ''.join (chunks)
+
+        with self._lock:
+            fh = self._fh
+            try:
+                path_id = self._paths [record.path]
+            except KeyError:
+                path_id = self._paths [record.path] = len (self._paths)
+                fh.write (_path_header.pack (PATH_RECORD, path_id,
+                                             len (record.path)))
+                fh.write (record.path)
+
+            try:
+                level_id = self._levels [record.level]
+            except KeyError:
+                level_id = self._levels [record.level] = len (self._levels)
+                fh.write (_level_header.pack (LEVEL_RECORD, level_id,
+                                              record.level [0],
+                                              len (record.level [1])))
+                fh.write (record.level [1])
+
+            fh.write (_message_header.pack (MESSAGE_RECORD, path_id,
+                                            level_id, record.level [0],
+                                            record.time, record.thread,
+                                            len (record.args), len (data)))
+            fh.write (data)
+
+    def flush (self):
+        with self._lock:
+            self._fh.flush ()
+
+    def close (self):
+        with self._lock:
+            self._fh.close ()
+
+
+def read_log_records (fname, prefix = None, level = None):
+    """
+    Returns a generator over the LogRecord objects stored in the
+    binary log file 'fname'.
+
+    Parameters:
+      - prefix: If given, only the records logged in the node with
+        this path name or its childs are returned.
+      - level: If given, only the records with this level or above
+        are returned.
+    """
+
+    fh = open (fname, 'rb')
+    try:
+        if fh.read (len (MAGIC)) != MAGIC:
+            raise IOError ('Not a binary log file: ' + fname)
+
+        paths   = {}
+        matches = {}
+        levels  = {}
+        while True:
+            kind = fh.read (1)
+            if not kind:
+                break
+            elif kind == MESSAGE_RECORD:
+                data = fh.read (_message_header.size - 1)
+                _, path_id, level_id, level_num, time, thread, count, size = \
+                   _message_header.unpack (kind + data)
+                if matches [path_id] and (level is None or
+                                          level_num >= level [0]):
+                    data = fh.read (size)
+                    fmt, offset = _decode_value (data, 0)
+                    args = []
+                    for i in xrange (count):
+                        arg, offset = _decode_value (data, offset)
+                        args.append (arg)
+                    yield LogRecord (paths [path_id], levels [level_id],
+                                     fmt, time, thread, tuple (args))
+                else:
+                    fh.seek (size, os.SEEK_CUR)
+            elif kind == PATH_RECORD:
+                data = fh.read (_path_header.size - 1)
+                _, path_id, size = _path_header.unpack (kind + data)
+                path = paths [path_id] = fh.read (size)
+                matches [path_id] = prefix is None or path == prefix or \
+                                    path.startswith (prefix + '.')
+            elif kind == LEVEL_RECORD:
+                data = fh.read (_level_header.size - 1)
+                _, level_id, level_num, size = _level_header.unpack (
+                    kind + data)
+                levels [level_id] = (level_num, fh.read (size))
+            else:
+                raise IOError ('Corrupt binary log file: ' + fname)
+    finally:
+        fh.close ()
+
+
+def main (argv = sys.argv):
+    """
+    Prints the records of the binary log files given in 'argv',
+    optionally filtered with the '--prefix' and '--level' options.
+    """
+
+    levels = dict ((lvl [1], lvl) for lvl in (LOG_FATAL, LOG_ERROR,
+                                              LOG_WARNING, LOG_INFO,
+                                              LOG_DEBUG))
+
+    prefix = OptionWith (str)
+    level  = OptionWith (levels.__getitem__)
+    args = ArgParser ()
+    args.add ('p', 'prefix', prefix)
+    args.add ('l', 'level', level)
+    args.parse (argv)
+
+    for fname in args.free_args:
+        for record in read_log_records (fname, prefix.value, level.value):
+            line = record.format ()
+            if isinstance (line, unicode):
+                line = line.encode ('utf-8')
+            sys.stdout.write (line)
+
+
+if __name__ == '__main__':
+    main ()
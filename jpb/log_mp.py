@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+#
+#  File:       log_mp.py
+#  Author:     Juan Pedro Bolívar Puente <raskolnikov@es.gnu.org>
+#  Date:       Mon Oct 19 14:05:51 2026
+#  Time-stamp: <2026-10-19 14:05:51 jbo>
+#
+
+#
+#  Copyright (C) 2012 Juan Pedro Bolívar Puente
+#
+#  This file is part of jpblib.
+#
+#  jpblib is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  jpblib is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Logging from several processes into a single log.
+
+Every process has its own GlobalLog, so the processes that write to
+the same files interleave and corrupt each other's lines. Instead,
+the child processes can connect a QueueLogListener that ships the
+messages as LogRecord objects through a multiprocessing queue to a
+LogCollector in the parent process, which logs them again in the
+node with the same path of its own log.
+"""
+
+from log import RecordLogListener, LogRecord, LogMessage, GlobalLog, \
+     LOG_DEBUG
+from Queue import Empty
+import multiprocessing
+import threading
+
+_STOP = None
+
+
+class QueueLogListener (RecordLogListener):
+    """
+    This is a log listener that puts a LogRecord for every message
+    in a queue. The path of the records is relative to the root of
+    the log, so the collector can log them in the same node of a log
+    with a different root name.
+    """
+
+    def __init__ (self, queue, level = LOG_DEBUG, *a, **k):
+        """
+        Constructor.
+
+        Parameters:
+          - queue: Queue where records are put, usually the 'queue'
+            of a LogCollector.
+          - level: The cut-off level. By default every message is
+            sent and the collector decides.
+        """
+        super (QueueLogListener, self).__init__ (level, *a, **k)
+        self.queue = queue
+
+    def on_message (self, node, level, msg):
+        """
+        Sends the message to the queue.
+        """
+        if level >= self._level:
+            path = '.'.join (node.get_path_list () [1:])
+            if isinstance (msg, LogMessage):
+                record = LogRecord (path, level, msg.fmt, args = msg.args)
+            else:
+                record = LogRecord (path, level, msg)
+            self.queue.put (record)
+
+
+class LogCollector (object):
+    """
+    Receives the records sent by the QueueLogListener of other
+    processes and logs them in the given log, the GlobalLog by
+    default. A background thread takes the records from the queue in
+    batches of up to 'batch_size' records.
+    """
+
+    def __init__ (self, log = None, queue = None, batch_size = 1024):
+        self.log        = log
+        self.queue      = multiprocessing.Queue () if queue is None else queue
+        self.batch_size = batch_size
+        self.errors     = 0
+
+        self._thread = threading.Thread (target = self._run,
+                                         name = 'LogCollector')
+        self._thread.daemon = True
+        self._thread.start ()
+
+    def listener (self, level = LOG_DEBUG):
+        """
+        Returns a listener that sends the messages to this collector.
+        """
+        return QueueLogListener (self.queue, level)
+
+    def close (self):
+        """
+        Logs the records already in the queue and stops the collector
+        thread. The processes sending to it should have finished.
+        """
+        if self._thread is not None:
+            self.queue.put (_STOP)
+            self._thread.join ()
+            self._thread = None
+
+    def _run (self):
+        queue = self.queue
+        running = True
+        while running:
+            records = [queue.get ()]
+            try:
+                while len (records) < self.batch_size:
+                    records.append (queue.get_nowait ())
+            except Empty:
+                pass
+
+            for record in records:
+                if record is _STOP:
+                    running = False
+                    continue
+                try:
+                    self._emit (record)
+                except Exception:
+                    self.errors += 1
+
+    def _emit (self, record):
+        log = self.log or GlobalLog ()
+        node = log.path (record.path) if record.path else log
+        node.log (record.level, record.fmt, *record.args)
+
+
+def setup_child_log (queue, level = LOG_DEBUG):
+    """
+    Disconnects the listeners that the GlobalLog of a forked child
+    process inherited from its parent, in every node of the tree, and
+    connects a QueueLogListener sending to 'queue' instead. Returns
+    the new listener.
+    """
+    listener = QueueLogListener (queue, level)
+    for node in GlobalLog ().iter_preorder ():
+        node.clear ()
+        signal = node.__dict__.get ('on_message')
+        if signal is not None:
+            signal.clear ()
+    GlobalLog ().connect (listener)
+    return listener
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+#
+#  File:       log_ring.py
+#  Author:     Juan Pedro Bolívar Puente <raskolnikov@es.gnu.org>
+#  Date:       Mon Oct 19 15:20:44 2026
+#  Time-stamp: <2026-10-19 15:20:44 jbo>
+#
+
+#
+#  Copyright (C) 2012 Juan Pedro Bolívar Puente
+#
+#  This file is part of jpblib.
+#
+#  jpblib is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  jpblib is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+In-memory log buffers for post-mortem dumps.
+
+A RingBufferLogListener keeps the last records logged in the subtree
+of the node it is connected to, usually including the debug messages
+that are too expensive to write to disk. The buffers are written to
+their files with 'dump_ring_buffers' when something goes wrong.
+"""
+
+from log import RecordLogListener, LogRecord, LogMessage, LOG_DEBUG
+from itertools import count
+from thread import get_ident
+import threading
+import time
+import weakref
+
+_ring_buffers = weakref.WeakSet ()
+
+
+class RingBufferLogListener (RecordLogListener):
+    """
+    This is a log listener that keeps the last 'capacity' messages
+    that it receives. Every slot of the buffer holds one tuple with
+    the whole message, replaced at once, so receiving a message only
+    builds that tuple and 'records' never sees half-written entries.
+    """
+
+    def __init__ (self, capacity = 1024, level = LOG_DEBUG,
+                  fname = None, *a, **k):
+        """
+        Constructor.
+
+        Parameters:
+          - capacity: Number of messages to keep.
+          - level: The cut-off level. By default this is LOG_DEBUG.
+          - fname: File where 'dump_ring_buffers' writes the records
+            of this buffer. When None, it is not dumped.
+        """
+        super (RingBufferLogListener, self).__init__ (level, *a, **k)
+        self.capacity = capacity
+        self.fname    = fname
+        self._lock    = threading.Lock ()
+        self._slots   = [ None ] * capacity
+        self._counter = count ()
+        self._total   = 0
+        self._first   = 0
+        _ring_buffers.add (self)
+
+    def on_message (self, node, level, msg):
+        """
+        Stores the message, overwriting the oldest one when full.
+        """
+        if level >= self._level:
+            if isinstance (msg, LogMessage):
+                fmt, args = msg.fmt, msg.args
+            else:
+                fmt, args = msg, ()
+            index = next (self._counter)
+            entry = (index, node.get_path_name (), level, fmt,
+                     time.time (), get_ident (), args)
+            slot = index % self.capacity
+            with self._lock:
+                # A thread that was slow to get here must not replace a
+                # newer message nor move the total backwards.
+                old = self._slots [slot]
+                if old is None or old [0] < index:
+                    self._slots [slot] = entry
+                self._total = max (self._total, index + 1)
+
+    def records (self):
+        """
+        Returns a list with copies of the stored records, from the
+        oldest to the newest.
+        """
+        with self._lock:
+            slots = list (self._slots)
+            total = self._total
+            first = max (self._first, total - self.capacity)
+        result = []
+        for i in xrange (first, total):
+            entry = slots [i % self.capacity]
+            if entry is not None and entry [0] == i:
+                result.append (LogRecord (*entry [1:]))
+        return result
+
+    def dump (self, out):
+        """
+        Writes the stored records to the file object 'out'.
+        """
+        for record in self.records ():
+            out.write (format_record_time (record) + record.format ())
+
+    def clear (self):
+        """
+        Forgets all the stored records.
+        """
+        with self._lock:
+            self._first = self._total
+
+
+def format_record_time (record):
+    """
+    Returns the time of 'record' formatted to prefix a dumped line.
+    """
+    return time.strftime ('%Y-%m-%d %H:%M:%S', time.localtime (record.time)) \
+           + '.%03d ' % (record.time % 1 * 1000)
+
+
+def dump_ring_buffers ():
+    """
+    Writes the records of every RingBufferLogListener with a 'fname'
+    to its file. Errors while writing are ignored, as this is usually
+    called when something already went wrong.
+    """
+    for listener in list (_ring_buffers):
+        if listener.fname is not None:
+            try:
+                out = open (listener.fname, 'w')
+                try:
+                    listener.dump (out)
+                finally:
+                    out.close ()
+            except (IOError, OSError):
+                pass
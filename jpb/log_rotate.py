@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+#
+#  File:       log_rotate.py
+#  Author:     Juan Pedro Bolívar Puente <raskolnikov@es.gnu.org>
+#  Date:       Mon Oct 19 12:20:44 2026
+#  Time-stamp: <2026-10-19 12:20:44 jbo>
+#
+
+#
+#  Copyright (C) 2012 Juan Pedro Bolívar Puente
+#
+#  This file is part of jpblib.
+#
+#  jpblib is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  jpblib is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Log files that rotate by size and time.
+
+Rotated files are named after the original file with an increasing
+sequence number appended (e.g. 'messages.log.12'). They are
+compressed with gzip and old ones are deleted by a background thread,
+so the thread that writes never waits for them.
+"""
+
+from log import StdLogListener, LOG_INFO
+from Queue import Queue
+import threading
+import gzip
+import time
+import os
+import os.path
+import re
+import shutil
+
+_STOP = object ()
+
+
+class RotatingFile (object):
+    """
+    File-like object that writes into a file named 'fname' that is
+    rotated when it grows over 'max_bytes' or every 'interval'
+    seconds. It can be used as output of any log listener.
+    """
+
+    def __init__ (self, fname,
+                  max_bytes      = 0,
+                  interval       = 0,
+                  backup_count   = 5,
+                  compress       = True,
+                  rotate_on_open = False,
+                  *a, **k):
+        """
+        Constructor.
+
+        Parameters:
+          - fname: Name of the file.
+          - max_bytes: Size that triggers a rotation. 0 disables
+            rotating by size.
+          - interval: Seconds between rotations. 0 disables rotating
+            by time.
+          - backup_count: Number of rotated files to keep.
+          - compress: Whether to gzip the rotated files.
+          - rotate_on_open: If the file exists, it is rotated instead
+            of appended to.
+        """
+
+        super (RotatingFile, self).__init__ (*a, **k)
+        self.file_name    = fname
+        self.max_bytes    = max_bytes
+        self.interval     = interval
+        self.backup_count = backup_count
+        self.compress     = compress
+
+        self._lock = threading.Lock ()
+        self._jobs = Queue ()
+        self._worker = threading.Thread (target = self._run,
+                                         name = 'RotatingFile')
+        self._worker.daemon = True
+        self._worker.start ()
+
+        self._sequence = max ([0] + [seq for seq, name
+                                     in self.rotated_files ()])
+        if rotate_on_open and os.path.exists (fname) and \
+               os.path.getsize (fname) > 0:
+            self._do_rotate (reopen = False)
+        self._open ()
+
+    def write (self, data):
+        with self._lock:
+            if self.interval and time.time () >= self._rotate_time:
+                self._do_rotate ()
+            self._fh.write (data)
+            self._size += len (data)
+            if self.max_bytes and self._size >= self.max_bytes:
+                self._do_rotate ()
+
+    def flush (self):
+        with self._lock:
+            self._fh.flush ()
+
+    def rotate (self):
+        """
+        Forces a rotation of the file.
+        """
+        with self._lock:
+            self._do_rotate ()
+
+    def close (self):
+        """
+        Closes the file and waits until the rotated files have been
+        compressed.
+        """
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close ()
+                self._fh = None
+                self._jobs.put (_STOP)
+        self._worker.join ()
+
+    def rotated_files (self):
+        """
+        Returns a sorted list of (sequence, file name) pairs with the
+        rotated files that exist on disk.
+        """
+        folder, base = os.path.split (os.path.abspath (self.file_name))
+        pattern = re.compile (re.escape (base) + r'\.(\d+)(\.gz)?$')
+        result = []
+        for name in os.listdir (folder):
+            match = pattern.match (name)
+            if match:
+                result.append ((int (match.group (1)),
+                                os.path.join (folder, name)))
+        result.sort ()
+        return result
+
+    def _open (self):
+        self._fh = open (self.file_name, 'a')
+        self._size = self._fh.tell ()
+        self._rotate_time = time.time () + self.interval
+
+    def _do_rotate (self, reopen = True):
+        if reopen:
+            self._fh.close ()
+        self._sequence += 1
+        rotated = '%s.%d' % (self.file_name, self._sequence)
+        os.rename (self.file_name, rotated)
+        self._jobs.put (rotated)
+        if reopen:
+            self._open ()
+
+    def _run (self):
+        while True:
+            rotated = self._jobs.get ()
+            if rotated is _STOP:
+                break
+            try:
+                if self.compress:
+                    self._compress (rotated)
+                self._prune ()
+            except (IOError, OSError):
+                pass
+
+    def _compress (self, fname):
+        src = open (fname, 'rb')
+        dst = gzip.open (fname + '.gz', 'wb')
+        try:
+            shutil.copyfileobj (src, dst)
+        finally:
+            src.close ()
+            dst.close ()
+        os.remove (fname)
+
+    def _prune (self):
+        rotated = self.rotated_files ()
+        for seq, name in rotated [:max (0, len (rotated) -
+                                        self.backup_count)]:
+            os.remove (name)
+
+
+class RotatingFileLogListener (StdLogListener):
+    """
+    This is a StdLogListener that writes all the messages into a
+    RotatingFile.
+    """
+
+    def __init__ (self, fname, level = LOG_INFO,
+                  max_bytes      = 0,
+                  interval       = 0,
+                  backup_count   = 5,
+                  compress       = True,
+                  rotate_on_open = False,
+                  *a, **k):
+        """
+        Constructor.
+
+        Parameters:
+          - fname: Name of the log file.
+          - level: The cut-off level. By default this is LOG_INFO.
+          - The rest of the parameters are passed to RotatingFile.
+        """
+        out = RotatingFile (fname,
+                            max_bytes      = max_bytes,
+                            interval       = interval,
+                            backup_count   = backup_count,
+                            compress       = compress,
+                            rotate_on_open = rotate_on_open)
+        super (RotatingFileLogListener, self).__init__ (level, out, out,
+                                                        *a, **k)
+
+    def close (self):
+        """
+        Closes the log file.
+        """
+        self.info_output.close ()
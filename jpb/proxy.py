@@ -25,6 +25,8 @@
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import types
+
 
 class AutoProxy (object):
     """
@@ -97,7 +99,11 @@ class AutoProxy (object):
     @classmethod
     def _create_class_proxy (cls, proxied_cls):
         """creates a proxy for the given class"""
+        return type ("%s(%s)" % (cls.__name__, proxied_cls.__name__), (cls,),
+                     cls._make_class_dict (proxied_cls))
 
+    @classmethod
+    def _make_class_dict (cls, proxied_cls):
         def make_method (name):
             def method (self, *args, **kw):
                 return getattr (self._proxied, name) (*args, **kw)
@@ -107,5 +113,62 @@ class AutoProxy (object):
         for name in cls._special_names:
             if hasattr (proxied_cls, name) and not hasattr (cls, name):
                 cls_dict [name] = make_method (name)
+        return cls_dict
+
+
+class FastAutoProxy (AutoProxy):
+    """
+    An AutoProxy whose generated class also forwards every method
+    defined by the proxied class. The forwarding methods call the
+    function of the proxied class directly, avoiding '__getattr__'
+    and the lookup of the method in the proxied instance. Thus, these
+    methods can not be overriden in the proxied instances themselves.
+
+    When 'cache_attributes' is True, other attributes are stored in
+    the proxy the first time they are retrieved. Call 'invalidate'
+    when they change in the proxied object.
+    """
+
+    cache_attributes = False
+
+    def __getattr__ (self, name):
+        value = getattr (self._proxied, name)
+        if self.cache_attributes and not name.startswith ('__'):
+            self.__dict__ [name] = value
+            self.__dict__.setdefault ('_cached_names', set ()).add (name)
+        return value
+
+    def invalidate (self, name = None):
+        """
+        Forgets the cached value of attribute 'name', or all of them
+        when 'name' is None.
+        """
+        cached = self.__dict__.get ('_cached_names', ())
+        names = list (cached) if name is None else \
+                [ name ] if name in cached else []
+        for name in names:
+            del self.__dict__ [name]
+            cached.discard (name)
+
+    @classmethod
+    def _make_class_dict (cls, proxied_cls):
+        def make_method (func):
+            def method (self, *args, **kw):
+                return func (self._proxied, *args, **kw)
+            method.__name__ = func.__name__
+            method.__doc__  = func.__doc__
+            return method
 
-        return type ("%s(%s)" % (cls.__name__, proxied_cls.__name__), (cls,), cls_dict)
+        cls_dict = super (FastAutoProxy, cls)._make_class_dict (proxied_cls)
+        special = set (cls._special_names)
+        for name in dir (proxied_cls):
+            if (name.startswith ('__') and name not in special) or \
+                   hasattr (cls, name):
+                continue
+            for klass in getattr (proxied_cls, '__mro__', ()):
+                if name in klass.__dict__:
+                    value = klass.__dict__ [name]
+                    if isinstance (value, types.FunctionType):
+                        cls_dict [name] = make_method (value)
+                    break
+        return cls_dict
@@ -35,6 +35,7 @@ from util import *
 from meta import *
 from proxy import *
 import weakref
+import types
 from functools import wraps
 
 class Slot (Destiny):
@@ -231,8 +232,38 @@ class AutoSignalSenderGet (Sender):
     """
     Same as 'AutoSignalSender' but implemented in a different way that
     may incurr in more overhead.
+
+    Only the attributes whose name may hold a Signal are inspected:
+    the Signal and non-method descriptor attributes of the class,
+    like those made by the 'signal' decorator, and the attributes
+    that are assigned a Signal. The proxy of every signal is made
+    once and reused. The cached proxies refer to the object weakly,
+    as a cycle with an object that has '__del__' is never collected.
+    Thus, a signal kept after the object is gone raises
+    ReferenceError when notified. The cache is not copied nor
+    pickled; copies make their own proxies.
     """
 
+    def __new__ (cls, *a, **k):
+        obj = super (AutoSignalSenderGet, cls).__new__ (cls)
+        obj.__dict__ ['_signal_names']   = set (_signal_candidates (cls))
+        obj.__dict__ ['_signal_proxies'] = {}
+        return obj
+
+    def __getstate__ (self):
+        state = dict (super (AutoSignalSenderGet, self).__getstate__ ())
+        state.pop ('_signal_names', None)
+        state.pop ('_signal_proxies', None)
+        return state
+
+    def __setstate__ (self, state):
+        self.__dict__.update (state)
+        names = set (_signal_candidates (type (self)))
+        names.update (name for name, attr in state.iteritems ()
+                      if isinstance (attr, Signal))
+        self.__dict__ ['_signal_names']   = names
+        self.__dict__ ['_signal_proxies'] = {}
+
     def __getattribute__ (self, name):
         """
         Used to inspect any attribute of the object at retrieval time,
@@ -240,10 +271,63 @@ class AutoSignalSenderGet (Sender):
         """
 
         attr = object.__getattribute__ (self, name)
-        if isinstance (attr, Signal):
-            return SenderSignalProxy (attr, self, name)
+        try:
+            names = object.__getattribute__ (self, '_signal_names')
+        except AttributeError:
+            if isinstance (attr, Signal):
+                return SenderSignalProxy (attr, self, name)
+            return attr
+
+        if name in names and isinstance (attr, Signal):
+            proxies = object.__getattribute__ (self, '_signal_proxies')
+            proxy = proxies.get (name)
+            if proxy is None or proxy._proxied is not attr:
+                proxy = proxies [name] = SenderSignalProxy (
+                    attr, weakref.proxy (self), name)
+            return proxy
         return attr
 
+    def __setattr__ (self, name, attr):
+        """
+        Keeps track of the attributes that are assigned a Signal.
+        """
+
+        names = self.__dict__.get ('_signal_names')
+        if names is not None:
+            if isinstance (attr, Signal):
+                names.add (name)
+            elif name not in _signal_candidates (type (self)):
+                names.discard (name)
+        object.__setattr__ (self, name, attr)
+
+
+def _signal_candidates (cls):
+    try:
+        return cls.__dict__ ['_signal_candidates']
+    except KeyError:
+        names = frozenset (
+            name for name in dir (cls)
+            if not name.startswith ('__') and _may_hold_signal (getattr (cls, name, None),
+                                 _lookup_class_attr (cls, name)))
+        type.__setattr__ (cls, '_signal_candidates', names)
+        return names
+
+def _lookup_class_attr (cls, name):
+    for klass in cls.__mro__:
+        if name in klass.__dict__:
+            return klass.__dict__ [name]
+    return None
+
+_routine_types = (types.FunctionType, types.MethodType,
+                  types.BuiltinFunctionType, types.GetSetDescriptorType,
+                  type (object.__init__), type (str.join),
+                  staticmethod, classmethod, type)
+
+def _may_hold_signal (value, raw):
+    return isinstance (value, Signal) or \
+           (hasattr (type (raw), '__get__') and
+            not isinstance (raw, _routine_types))
+
 
 class SenderSignal (Signal):
     """
@@ -276,7 +360,7 @@ class SenderSignal (Signal):
         self._sender.send (self._message, *args, **kws)
 
 
-class SenderSignalProxy (AutoProxy):
+class SenderSignalProxy (FastAutoProxy):
     """
     This proxies a Signal adding the features of SenderSignal to it.
     """
@@ -309,7 +393,7 @@ class SenderSignalProxy (AutoProxy):
         message to the registered sender with the given arguments.
         """
 
-        self.proxied.notify (*args, **kws)
+        self._proxied.notify (*args, **kws)
         self._sender.send (self._message, *args, **kws)
 
 
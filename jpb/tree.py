@@ -31,6 +31,16 @@ This module provides a generic implementation of the Composite
 pattern.
 """
 
+from collections import deque
+import itertools
+import threading
+
+# Generation numbers are never reused by any tree, so caches stamped
+# in one tree are never valid in another.
+_generation_lock = threading.Lock ()
+_generation_count = itertools.count ()
+
+
 class AutoTreeTraits (object):
     """
     This class encapsulates the parameters for an AutoTree
@@ -90,6 +100,10 @@ class AutoTree (object):
         self._name = self._traits.name_type () if name is None else name
         self._parent = None
         self._childs = {}
+        self._path_cache = None
+        self._path_cache_generation = None
+        self._path_name_generation = None
+        self._tree_generation = [ next (_generation_count) ]
 
 
     def child (self, name):
@@ -103,11 +117,7 @@ class AutoTree (object):
         try:
             child = self._childs [name]
         except KeyError:
-            if self._traits.child_cls:
-                child = self._traits.child_cls ()
-            else:
-                child = self.__class__ ()
-            self.adopt (child, name)
+            child = self._new_child (name)
 
         return child
 
@@ -120,11 +130,22 @@ class AutoTree (object):
         """
         Returns the child that is specified in the given path.  All
         the non existing nodes along the path are created using de
-        rules described in 'child'.
+        rules described in 'child'. The result is cached until a
+        node of any tree is moved, removed or renamed.
         """
 
-        path = str.split (path_name, self._traits.separator)
-        return reduce (AutoTree.child, path, self)
+        cache = self._path_cache
+        generation = self._tree_generation [0]
+        if self._path_cache_generation != generation:
+            cache = self._path_cache = {}
+            self._path_cache_generation = generation
+
+        try:
+            return cache [path_name]
+        except KeyError:
+            path = str.split (path_name, self._traits.separator)
+            node = cache [path_name] = reduce (AutoTree.child, path, self)
+            return node
 
     get_path = path
 
@@ -138,7 +159,9 @@ class AutoTree (object):
         """
         Returns the absolute path of this node starting from the root.
         """
-        return self._traits.separator.join (self.get_path_list ())
+        if self._path_name_generation != self._tree_generation [0]:
+            self._update_path_name ()
+        return self._path_name
 
     def get_path_list (self, base = None):
         """
@@ -147,16 +170,33 @@ class AutoTree (object):
         list passed in the parameter 'base'.
         """
 
-        if base is None:
-            base = []
+        if self._path_name_generation != self._tree_generation [0]:
+            self._update_path_name ()
 
-        if self._parent:
-            base = self._parent.get_path_list (base)
-            base.append (self._name)
-            return base
-        else:
-            base.append (self._name)
-            return base
+        if base is None:
+            return list (self._path_list)
+        base.extend (self._path_list)
+        return base
+
+    def _update_path_name (self):
+        generation = self._tree_generation [0]
+        stale = []
+        node = self
+        while node is not None and \
+                  node._path_name_generation != generation:
+            stale.append (node)
+            node = node._parent
+
+        for node in reversed (stale):
+            parent = node._parent
+            if parent is not None:
+                node._path_list = parent._path_list + (node._name,)
+                node._path_name = parent._path_name + \
+                                  node._traits.separator + node._name
+            else:
+                node._path_list = (node._name,)
+                node._path_name = node._name
+            node._path_name_generation = generation
 
     def parent (self):
         """
@@ -186,10 +226,16 @@ class AutoTree (object):
         old_parent = child._parent
         if old_parent:
             old_parent.remove (child.get_name ())
-
-        child._parent = self
-        child._name   = name
-        self._childs [name] = child
+        replaced = name in self._childs
+        child._path_name_generation = None
+        self._link_child (child, name)
+        if child._childs:
+            for node in child.iter_preorder ():
+                node._tree_generation = self._tree_generation
+        # The subtree may still share the generation of this tree if
+        # it was removed from it, so its cached names must be dropped.
+        if replaced or child._childs:
+            self._touch_tree ()
         self._handle_tree_new_child (child)
 
         return child
@@ -203,6 +249,7 @@ class AutoTree (object):
         child = self._childs [name]
         self._handle_tree_del_child (child)
         del self._childs [name]
+        self._touch_tree ()
         child._parent = None
         child._name = self._traits.name_type ()
 
@@ -217,6 +264,7 @@ class AutoTree (object):
             del self._parent._childs [self._name]
             self._parent._childs [name] = self
         self._name = name
+        self._touch_tree ()
 
     def dfs_preorder (self, func):
         """
@@ -225,18 +273,89 @@ class AutoTree (object):
         parameter.
         """
 
-        func (self)
-        for child in self._childs.values ():
-            child.dfs_preorder (func)
+        for node in self.iter_preorder ():
+            func (node)
 
     def dfs_postorder (self, func):
         """
         Same as 'dfs_preorder', but using postorder deep-first-search.
         """
 
-        for child in self._childs.values ():
-            child.dfs_postorder (func)
-        func (self)
+        # The whole tree is visited anyway, so it is cheaper to collect
+        # the reverse of the postorder, which is a plain preorder with
+        # the childs in reverse order, than to keep an iterator for
+        # every node in the path like 'iter_postorder' does.
+        nodes = []
+        stack = [self]
+        while stack:
+            node = stack.pop ()
+            nodes.append (node)
+            stack.extend (node._childs.values ())
+        for node in reversed (nodes):
+            func (node)
+
+    def iter_preorder (self):
+        """
+        Returns a generator over the nodes of this tree in preorder
+        deep-first-search. Nodes are produced lazily, so the crawling
+        can be stopped at any time.
+        """
+
+        stack = [self]
+        while stack:
+            node = stack.pop ()
+            yield node
+            childs = node._childs.values ()
+            childs.reverse ()
+            stack.extend (childs)
+
+    def iter_postorder (self):
+        """
+        Same as 'iter_preorder', but using postorder deep-first-search.
+        """
+
+        stack = [(self, iter (self._childs.values ()))]
+        while stack:
+            node, childs = stack [-1]
+            for child in childs:
+                stack.append ((child, iter (child._childs.values ())))
+                break
+            else:
+                stack.pop ()
+                yield node
+
+    def iter_breadth_first (self):
+        """
+        Returns a generator over the nodes of this tree in
+        breadth-first-search order.
+        """
+
+        queue = deque ([self])
+        while queue:
+            node = queue.popleft ()
+            yield node
+            queue.extend (node._childs.values ())
+
+    def iter_limited (self, max_depth = None, prune = None):
+        """
+        Returns a generator over the nodes of this tree in preorder
+        deep-first-search, like 'iter_preorder', but not going deeper
+        than 'max_depth' levels under this node, which is at depth
+        0. If 'prune' is given, it is called on every node and the
+        nodes for which it returns True are skipped together with
+        their whole subtree.
+        """
+
+        stack = [(self, 0)]
+        while stack:
+            node, depth = stack.pop ()
+            if prune is not None and prune (node):
+                continue
+            yield node
+            if max_depth is None or depth < max_depth:
+                childs = node._childs.values ()
+                childs.reverse ()
+                stack.extend ((child, depth + 1) for child in childs)
 
     def childs (self):
         """
@@ -244,6 +363,47 @@ class AutoTree (object):
         """
         return self._childs.values ()
 
+    def _new_child (self, name):
+        """
+        Called by 'child' when there is no child named 'name'. It
+        creates the new node using the class given in the traits or
+        self.__class__, adopts it and returns it.
+        """
+
+        return self.adopt (self._make_child_node (), name)
+
+    def _make_child_node (self):
+        """
+        Returns a new parentless node of the class given in the traits
+        or self.__class__.
+        """
+
+        if self._traits.child_cls:
+            return self._traits.child_cls ()
+        return self.__class__ ()
+
+    def _link_child (self, child, name):
+        """
+        Inserts the parentless node 'child' into this node with the
+        given 'name' without notifying anyone.
+        """
+
+        child._parent = self
+        child._name   = name
+        child._tree_generation = self._tree_generation
+        self._childs [name] = child
+        return child
+
+    def _touch_tree (self):
+        """
+        Invalidates the lookup and path name caches of the tree of
+        this node. This is called whenever a node is moved, removed
+        or renamed. A removed subtree keeps sharing the generation of
+        its former tree until it is adopted somewhere else.
+        """
+        with _generation_lock:
+            self._tree_generation [0] = next (_generation_count)
+
     def _handle_tree_new_child (self, child):
         pass
 
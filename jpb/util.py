@@ -27,6 +27,9 @@
 
 
 import functools
+import threading
+from collections import OrderedDict
+from time import time as _now
 
 near0 = 0.0001
 
@@ -90,22 +93,61 @@ class lazyprop (object):
 
 
 class MultiMethod (object):
+    """
+    A function that dispatches on the classes of all its arguments.
+    When there is no function registered for the exact classes, the
+    most specific signature that the classes match is used, where a
+    signature is more specific than another if each of its types is
+    a subclass of the corresponding one. Resolved signatures are
+    cached until the next 'register'.
+    """
 
     def __init__ (self, name):
         self.name = name
         self.typemap = {}
+        self._cache = {}
 
     def __call__ (self, *args):
         types = tuple (arg.__class__ for arg in args)
-        function = self.typemap.get (types)
-        if function is None:
-            raise TypeError ("no match")
+        try:
+            function = self._cache [types]
+        except KeyError:
+            function = self._cache [types] = self.resolve (types)
         return function(*args)
 
     def register (self, types, function):
         if types in self.typemap:
             raise TypeError ("duplicate registration")
         self.typemap[types] = function
+        self._cache.clear ()
+
+    def resolve (self, types):
+        """
+        Returns the function registered for the most specific
+        signature matching 'types'. Raises TypeError if there is no
+        match or several matching signatures are equally specific.
+        """
+        function = self.typemap.get (types)
+        if function is not None:
+            return function
+
+        matches = [ sig for sig in self.typemap
+                    if _signature_matches (types, sig) ]
+        best = [ sig for sig in matches
+                 if not any (other != sig and
+                             _signature_matches (other, sig)
+                             for other in matches) ]
+        if not best:
+            raise TypeError ("no match")
+        if len (best) > 1:
+            raise TypeError ("ambiguous call to %s, candidates: %s" %
+                             (self.name, best))
+        return self.typemap [best [0]]
+
+
+def _signature_matches (types, signature):
+    return len (types) == len (signature) and \
+           all (issubclass (t, s) for t, s in zip (types, signature))
 
 
 _multimethod_registry = {}
@@ -144,6 +186,129 @@ class memoize:
         return ret
 
 
+_KWMARK = object ()
+
+def make_key (args, kwargs):
+    """
+    Returns a hashable key for a call with the given positional and
+    keyword arguments. The key does not depend on the order in which
+    the keywords were given.
+    """
+    if kwargs:
+        return args + (_KWMARK,) + tuple (sorted (kwargs.iteritems ()))
+    return args
+
+
+class lru_memoize (object):
+    """
+    Memoization decorator with a bounded cache. Use it as:
+
+        @lru_memoize (maxsize = 128, ttl = None, thread_safe = False)
+        def function (...): ...
+
+    Parameters:
+      - maxsize: Maximum number of results kept. When exceeded, the
+        least recently used one is evicted. None means unbounded.
+      - ttl: Seconds after which a result is computed again, or None
+        for results that never expire.
+      - thread_safe: If True, the cache can be used from several
+        threads. When several threads miss on the same key, only one
+        computes the result and the rest wait for it.
+
+    The decorated function has 'hits', 'misses' and 'evictions'
+    counters and a 'cache_clear' method. Arguments must be hashable.
+    """
+
+    def __init__ (self, maxsize = 128, ttl = None, thread_safe = False):
+        self.maxsize     = maxsize
+        self.ttl         = ttl
+        self.thread_safe = thread_safe
+
+    def __call__ (self, function):
+        return _LruMemoized (function, self.maxsize, self.ttl,
+                             self.thread_safe)
+
+
+class _LruMemoized (object):
+
+    def __init__ (self, function, maxsize, ttl, thread_safe):
+        functools.update_wrapper (self, function)
+        self.function  = function
+        self.maxsize   = maxsize
+        self.ttl       = ttl
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+        self._cache    = OrderedDict ()
+        self._lock     = threading.Lock () if thread_safe else None
+        self._pending  = {}
+
+    def __get__ (self, obj, cls = None):
+        if obj is None:
+            return self
+        return functools.partial (self, obj)
+
+    def __call__ (self, *args, **kwargs):
+        key = make_key (args, kwargs)
+        if self._lock is None:
+            try:
+                return self._lookup (key)
+            except KeyError:
+                self.misses += 1
+                return self._store (key, self.function (*args, **kwargs))
+
+        while True:
+            with self._lock:
+                try:
+                    return self._lookup (key)
+                except KeyError:
+                    pending = self._pending.get (key)
+                    if pending is None:
+                        pending = self._pending [key] = threading.Event ()
+                        self.misses += 1
+                        break
+            pending.wait ()
+
+        try:
+            value = self.function (*args, **kwargs)
+            with self._lock:
+                return self._store (key, value)
+        finally:
+            with self._lock:
+                del self._pending [key]
+            pending.set ()
+
+    def cache_clear (self):
+        """
+        Forgets all the results and resets the counters.
+        """
+        if self._lock is not None:
+            with self._lock:
+                self._cache.clear ()
+        else:
+            self._cache.clear ()
+        self.hits = self.misses = self.evictions = 0
+
+    def _lookup (self, key):
+        cache = self._cache
+        value, expiry = cache.pop (key)
+        if expiry is not None and expiry <= _now ():
+            self.evictions += 1
+            raise KeyError (key)
+        cache [key] = value, expiry
+        self.hits += 1
+        return value
+
+    def _store (self, key, value):
+        cache = self._cache
+        cache [key] = value, (None if self.ttl is None else
+                              _now () + self.ttl)
+        if self.maxsize is not None and len (cache) > self.maxsize:
+            cache.popitem (last = False)
+            self.evictions += 1
+        return value
+
+
 def printfn (message):
     print message
 
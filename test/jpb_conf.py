@@ -26,6 +26,8 @@
 #
 
 import unittest
+import threading
+import sys
 from jpb.conf import *
 
 class TestConfBackend(unittest.TestCase):
@@ -93,3 +95,263 @@ class TestConfBackend(unittest.TestCase):
 
         self.assertTrue (isinstance (cfg.path ("h.o.l.a"), ConfNode))
         self.assertTrue (not isinstance (cfg.path ("h.o.l.a"), GlobalConf))
+
+class TestConfBulkFill (unittest.TestCase):
+
+    class CountingListener (ConfListener):
+        def __init__ (self):
+            super (TestConfBulkFill.CountingListener, self).__init__ ()
+            self.changes = []
+            self.new_childs = 0
+        def on_conf_change (self, node):
+            self.changes.append (node)
+        def on_conf_new_child (self, node):
+            self.new_childs += 1
+
+    def test_bulk_fill (self):
+        c = ConfNode ()
+        c.child ('a').value = 0
+        listener = TestConfBulkFill.CountingListener ()
+        c.connect (listener)
+        c.child ('a').connect (listener)
+
+        c.bulk_fill ({ 'a' : 1, 'b' : { 'c' : 2, 'd' : 3 } })
+
+        self.assertEqual (c.to_dict (), { 'a' : 1,
+                                          'b' : { 'c' : 2, 'd' : 3 } })
+        self.assertEqual (listener.changes, [c])
+        self.assertEqual (listener.new_childs, 0)
+
+    def test_bulk_fill_backend (self):
+        c = ConfNode ()
+        c.backend = TestConfBackend.MockBackend ()
+        c.bulk_fill ({ 'a' : { 'b' : 1 } })
+
+        self.assertEqual (c.backend.called, "_handle_conf_change")
+        self.assertTrue (c.path ('a.b').backend is c.backend)
+
+    def test_dict_copy (self):
+        c = ConfNode ({ 'a' : 1, 'b' : { 'c' : 2 } })
+        d = c.dict_copy ()
+        self.assertEqual (d.to_dict (), c.to_dict ())
+        self.assertEqual (d.path ('b.c').get_path_name (), '.b.c')
+
+
+class TestConfSnapshot (unittest.TestCase):
+
+    def setUp (self):
+        self.conf = ConfNode ({ 'a' : { 'x' : 1, 'y' : 2 },
+                                'b' : { 'z' : 3 } })
+
+    def test_snapshot (self):
+        snap = self.conf.snapshot ()
+        self.assertEqual (snap.to_dict (), self.conf.to_dict ())
+        self.assertEqual (snap.path ('a.x').value, 1)
+        self.assertEqual (snap.child ('b').name, 'b')
+        self.assertTrue (snap.has_child ('a'))
+        self.assertRaises (KeyError, snap.path, 'a.w')
+        self.assertRaises (AttributeError, setattr, snap, '_value', 1)
+        self.assertTrue (self.conf.snapshot () is snap)
+
+    def test_set_value (self):
+        old = self.conf.snapshot ()
+        self.conf.path ('a.x').value = 10
+
+        new = self.conf.snapshot ()
+        self.assertEqual (old.path ('a.x').value, 1)
+        self.assertEqual (new.path ('a.x').value, 10)
+        self.assertTrue (new.child ('b') is old.child ('b'))
+        self.assertTrue (new.path ('a.y') is old.path ('a.y'))
+        self.assertTrue (self.conf.child ('a').snapshot () is new.child ('a'))
+
+        self.conf.path ('a.w').default (5)
+        self.assertEqual (self.conf.snapshot ().path ('a.w').value, 5)
+
+    def test_structure (self):
+        old = self.conf.snapshot ()
+        self.conf.path ('b.new.deep').value = 4
+        self.assertEqual (self.conf.snapshot ().path ('b.new.deep').value, 4)
+
+        removed = self.conf.remove ('a')
+        self.assertFalse (self.conf.snapshot ().has_child ('a'))
+        self.assertEqual (removed.snapshot ().name, '')
+        self.assertEqual (removed.snapshot ().child ('x').value, 1)
+
+        self.conf.child ('b').rename ('c')
+        self.assertEqual (self.conf.snapshot ().to_dict (),
+                          { 'c' : { 'z' : 3, 'new' : { 'deep' : 4 } } })
+
+        self.conf.child ('c').adopt (removed, 'a')
+        self.assertEqual (self.conf.snapshot ().path ('c.a.y').value, 2)
+        self.assertEqual (old.to_dict (), { 'a' : { 'x' : 1, 'y' : 2 },
+                                            'b' : { 'z' : 3 } })
+
+    def test_concurrent (self):
+        self.conf.snapshot ()
+        def write (path):
+            node = self.conf.path (path)
+            for i in xrange (5000):
+                node.value = i
+        threads = [ threading.Thread (target = write, args = (path,))
+                    for path in ('a', 'a.x', 'a.y') ]
+        interval = sys.getcheckinterval ()
+        sys.setcheckinterval (1)
+        try:
+            for thread in threads:
+                thread.start ()
+            for thread in threads:
+                thread.join ()
+        finally:
+            sys.setcheckinterval (interval)
+        self.assertEqual (self.conf.snapshot ().child ('a').value, 4999)
+        self.assertEqual (self.conf.snapshot ().to_dict (),
+                          self.conf.to_dict ())
+
+    def test_bulk_fill (self):
+        self.conf.child ('b').snapshot ()
+        self.conf.child ('b').bulk_fill ({ 'z' : 5, 'w' : { 'v' : 6 } })
+        self.assertEqual (self.conf.child ('b').snapshot ().to_dict (),
+                          { 'z' : 5, 'w' : { 'v' : 6 } })
+
+
+class TestConfTransaction (unittest.TestCase):
+
+    class CountingBackend (NullBackend):
+        def __init__ (self):
+            self.changes = []
+        def _handle_conf_change (self, node):
+            self.changes.append (node)
+
+    def setUp (self):
+        self.conf = ConfNode ({ 'a' : { 'x' : 1, 'y' : 2 }, 'b' : 3 })
+        self.backend = TestConfTransaction.CountingBackend ()
+        self.conf.backend = self.backend
+        self.listener = TestConfBulkFill.CountingListener ()
+        for node in self.conf.iter_preorder ():
+            node.connect (self.listener)
+
+    def test_commit (self):
+        snap = self.conf.snapshot ()
+        with self.conf.transaction ():
+            self.conf.path ('a.x').value = 10
+            self.conf.path ('a.y').value = 20
+            self.conf.path ('a.x').value = 11
+            self.assertEqual (self.conf.path ('a.x').value, 11)
+            self.assertEqual (self.listener.changes, [])
+            self.assertTrue (self.conf.snapshot () is snap)
+
+        self.assertEqual (self.listener.changes,
+                          [self.conf.path ('a.x'), self.conf.path ('a.y')])
+        self.assertEqual (self.backend.changes, [self.conf])
+        self.assertEqual (self.conf.snapshot ().to_dict (),
+                          { 'a' : { 'x' : 11, 'y' : 20 }, 'b' : 3 })
+
+    def test_rollback (self):
+        def update ():
+            with self.conf.child ('a').transaction ():
+                self.conf.path ('a.x').value = 10
+                self.conf.path ('a.z').default (5)
+                raise ValueError
+        self.assertRaises (ValueError, update)
+
+        self.assertEqual (self.conf.to_dict (),
+                          { 'a' : { 'x' : 1, 'y' : 2, 'z' : None }, 'b' : 3 })
+        self.assertEqual (self.listener.changes, [])
+        self.assertEqual (self.backend.changes, [])
+
+    def test_scope (self):
+        with self.conf.child ('a').transaction ():
+            self.conf.child ('b').value = 4
+            self.assertEqual (self.listener.changes, [self.conf.child ('b')])
+            with self.conf.transaction ():
+                self.conf.path ('a.x').value = 10
+            self.assertEqual (len (self.listener.changes), 1)
+        self.assertEqual (self.listener.changes,
+                          [self.conf.child ('b'), self.conf.path ('a.x')])
+        self.assertEqual (self.backend.changes,
+                          [self.conf.child ('b'), self.conf.child ('a')])
+
+    def test_commit_event (self):
+        class CommitListener (ConfListener):
+            def __init__ (self):
+                super (CommitListener, self).__init__ ()
+                self.commits = []
+            def on_conf_commit (self, nodes):
+                self.commits.append (nodes)
+
+        listener = CommitListener ()
+        self.conf.connect (listener)
+        with self.conf.transaction ():
+            self.conf.path ('a.x').value = 10
+            self.conf.child ('b').value = 4
+        self.assertEqual (listener.commits,
+                          [[self.conf.path ('a.x'), self.conf.child ('b')]])
+
+    def test_thread (self):
+        def write ():
+            self.conf.child ('b').value = 4
+        def update ():
+            with self.conf.transaction ():
+                self.conf.path ('a.x').value = 10
+                worker = threading.Thread (target = write)
+                worker.start ()
+                worker.join ()
+                raise ValueError
+        self.assertRaises (ValueError, update)
+
+        self.assertEqual (self.conf.to_dict (),
+                          { 'a' : { 'x' : 1, 'y' : 2 }, 'b' : 4 })
+        self.assertEqual (self.listener.changes, [self.conf.child ('b')])
+        self.assertEqual (self.backend.changes, [self.conf.child ('b')])
+
+    def test_thread_same_node (self):
+        seen = []
+        def write ():
+            seen.append (self.conf.path ('a.x').value)
+            self.conf.path ('a.x').value = 7
+        def update ():
+            with self.conf.transaction ():
+                self.conf.path ('a.x').value = 2
+                worker = threading.Thread (target = write)
+                worker.start ()
+                worker.join ()
+                self.assertEqual (self.conf.path ('a.x').value, 2)
+                raise ValueError
+        self.assertRaises (ValueError, update)
+
+        self.assertEqual (seen, [1])
+        self.assertEqual (self.conf.path ('a.x').value, 7)
+        self.assertEqual (self.conf.snapshot ().path ('a.x').value, 7)
+        self.assertEqual (self.listener.changes, [self.conf.path ('a.x')])
+
+    def test_sub_backend (self):
+        conf = ConfNode ({ 'a' : { 'x' : 1 }, 'b' : 3 })
+        backend = TestConfTransaction.CountingBackend ()
+        conf.child ('a').backend = backend
+        with conf.transaction ():
+            conf.path ('a.x').value = 10
+            conf.child ('b').value = 4
+        self.assertEqual (backend.changes, [conf.path ('a.x')])
+
+
+class TestConfPerformance (unittest.TestCase):
+
+    test_width = 1 << 17
+
+    def test_performance_wide_snapshot (self):
+        import timeit
+        conf = ConfNode (dict (('n%d' % i, i)
+                               for i in xrange (self.test_width)))
+        node = conf.child ('n0')
+        t1 = min (timeit.repeat (lambda: node.set_value (1),
+                                 number = 1 << 8, repeat = 3))
+        old = conf.snapshot ()
+        t2 = min (timeit.repeat (lambda: node.set_value (2),
+                                 number = 1 << 8, repeat = 3))
+        self.assertEqual (old.child ('n0').value, 1)
+        self.assertEqual (conf.snapshot ().child ('n0').value, 2)
+        self.assertTrue (conf.snapshot ().child ('n1') is old.child ('n1'))
+        print
+        print "ConfNode.set_value with", self.test_width, "siblings -- "
+        print "   Without snapshot: ", t1
+        print "   With snapshot:    ", t2
@@ -302,6 +302,24 @@ class TestCoop(unittest.TestCase):
                     pass
         self.assertRaises(coop.CooperativeError, make_class)
 
+    def test_override_through_intermediate_class(self):
+        @self.cls_decorator.im_func
+        class _Root(object):
+            __metaclass__ = self.cls_meta
+            @coop.cooperative
+            def method(self):
+                pass
+        @self.cls_decorator.im_func
+        class _Middle(_Root):
+            __metaclass__ = self.cls_meta
+        @self.cls_decorator.im_func
+        class _Leaf(_Middle):
+            __metaclass__ = self.cls_meta
+            @coop.cooperate
+            def method(self):
+                pass
+        _Leaf().method()
+
     def test_mro_call_order(self):
         for cls in (self._D, self._C, self._B, self._A):
             obj = cls()
@@ -363,6 +381,45 @@ class TestCoop(unittest.TestCase):
         obj = _Cls()
         self.assertRaises(coop.CooperativeError, obj.method, 1)
 
+    def test_inner_cooperate_threads(self):
+        import threading
+        @self.cls_decorator.im_func
+        class _Cls(self._D):
+            __metaclass__ = self.cls_meta
+            @coop.inner_cooperate
+            def method(self, next_method, param):
+                next_method(b_mparam=param)
+        errors = []
+        def work(index):
+            try:
+                for i in xrange(200):
+                    obj = _Cls()
+                    obj.method((index, i))
+                    assert obj._b_mparam == (index, i)
+            except Exception, e:
+                errors.append(e)
+        threads = [threading.Thread(target=work, args=(i,))
+                   for i in xrange(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+
+    def test_inner_error_recovers(self):
+        calls = [2]
+        @self.cls_decorator.im_func
+        class _Cls(self._D):
+            __metaclass__ = self.cls_meta
+            @coop.inner_cooperate
+            def method(self, next_method, param):
+                for i in xrange(calls[0]):
+                    next_method()
+        obj = _Cls()
+        self.assertRaises(coop.CooperativeError, obj.method, 1)
+        calls[0] = 1
+        obj.method(1)
+
     def _clear_trace(self):
         self._trace[:] = []
 
@@ -389,6 +446,109 @@ class TestCoopMeta(TestCoop):
         _NewClass()
         self._check_trace_calls_with_mro(_NewClass.__init__)
 
+class TestCoopGenerated(TestCoopMeta):
+
+    cls_meta = coop.GeneratedCooperativeMeta
+
+    def test_generated_wrapper_attributes(self):
+        init = self._D.__dict__['__init__']
+        self.assertEqual(init._cooperative_mode, 'pre')
+        self.assertEqual(init._cooperative_fixed, {})
+        self.assertEqual(init.__name__, '__init__')
+        self.assertTrue(init.func_code.co_filename.startswith('<cooperative'))
+        self.assertFalse(self._D.__dict__['method'].func_code.co_filename
+                         .startswith('<cooperative'))
+
+    def test_generated_fixed_keywords(self):
+        outer_self = self
+        class _Fixed(self._D):
+            @coop.post_cooperate_with_params(b_param='fixed_b_param')
+            def __init__(self, f_param='f_param'):
+                self._f_param = f_param
+        obj = _Fixed(f_param='new_f_param', b_param='ignored')
+        self.assertEqual(obj._f_param, 'new_f_param')
+        self.assertEqual(obj._b_param, 'fixed_b_param')
+        init = _Fixed.__dict__['__init__']
+        self.assertEqual(init._cooperative_mode, 'post')
+        self.assertEqual(init._cooperative_fixed, {'b_param': 'fixed_b_param'})
+
+    def test_generated_unknown_keyword(self):
+        self.assertRaises(TypeError, self._D, unknown='unknown')
+
+    def test_generated_is_scoped(self):
+        generic = make_deep_hierarchy(1)
+        self.assertFalse(generic.__dict__['__init__'].func_code
+                         .co_filename.startswith('<cooperative'))
+
+class TestCoopPlanned(TestCoopMeta):
+
+    cls_meta = coop.PlannedCooperativeMeta
+
+    def test_plan_is_built_lazily(self):
+        self.assertFalse('_cooperative_init_plan' in self._D.__dict__)
+        self._D()
+        plan = self._D.__dict__['_cooperative_init_plan']
+        self.assertEqual(len(plan.methods), 4)
+        self.assertEqual(plan.route, {'b_param': 1, 'd_param': 0})
+
+    def test_plan_fixed_keywords(self):
+        class _Fixed(self._D):
+            @coop.post_cooperate_with_params(b_param='fixed_b_param')
+            def __init__(self, f_param='f_param'):
+                self._f_param = f_param
+        obj = _Fixed(f_param='new_f_param', b_param='ignored',
+                     d_param='new_d_param')
+        self.assertEqual(obj._f_param, 'new_f_param')
+        self.assertEqual(obj._b_param, 'fixed_b_param')
+        self.assertEqual(obj._d_param, 'new_d_param')
+        self.assertEqual(_Fixed.__dict__['_cooperative_init_plan'].route,
+                         {'b_param': None, 'd_param': 1, 'f_param': 0})
+
+    def test_plan_order(self):
+        outer_self = self
+        class _Post(self._D):
+            @coop.post_cooperate
+            def __init__(self):
+                outer_self._trace.append(_Post.__init__)
+        self._clear_trace()
+        _Post()
+        self.assertEqual([m.im_class for m in self._trace],
+                         [_Post, self._A, self._C, self._B, self._D])
+
+    def test_plan_fallback(self):
+        class _Manual(self._D):
+            @coop.manual_cooperate
+            def __init__(self, *a, **k):
+                super(_Manual, self).__init__(*a, **k)
+        _Manual(d_param='new_d_param')
+        self.assertTrue(_Manual.__dict__['_cooperative_init_plan'] is None)
+        self.assertRaises(TypeError, self._D, 'positional')
+        self.assertRaises(TypeError, self._D, unknown='unknown')
+
+def make_deep_hierarchy(depth, base=coop.Cooperative):
+    cls = base
+    for i in xrange(depth):
+        def __init__(self, param=None):
+            pass
+        cls = type(base)('_Deep%d' % i, (cls,), {
+            '__init__': coop.cooperate(__init__)})
+    return cls
+
+class _InnerTestBase(coop.Cooperative):
+    @coop.cooperative
+    def method(self, param=None):
+        pass
+class _InnerTestDeriv(_InnerTestBase):
+    @coop.inner_cooperate
+    def method(self, next_method, deriv_param=None):
+        next_method(param=deriv_param)
+class _InnerManualBase(object):
+    def method(self, param=None):
+        pass
+class _InnerManualDeriv(_InnerManualBase):
+    def method(self, deriv_param=None, **k):
+        super(_InnerManualDeriv, self).method(param=deriv_param, **k)
+
 class _TestBase(object):
     def __init__(self, param=None,*a, **k):
         super(_TestBase, self).__init__(*a, **k)
@@ -459,3 +619,78 @@ class TestCoopPerformance(unittest.TestCase):
         print "   Coop:   ", t2
         print "   Ratio:  ", t2/t1
 
+
+    def test_performance_class_creation(self):
+        import timeit
+        def make_method(name):
+            def method(self, param=None):
+                pass
+            method.__name__ = name
+            return method
+        def make_hierarchy(count=1000, fanout=4):
+            classes = [coop.Cooperative]
+            for i in xrange(count):
+                base = classes[i // fanout]
+                classes.append(coop.CooperativeMeta('_Gen%d' % i, (base,), {
+                    '__init__': coop.cooperate(make_method('__init__')),
+                    'method':   (coop.cooperate if i else coop.cooperative)(
+                        make_method('method')),
+                    'other%d' % i: coop.cooperative(
+                        make_method('other%d' % i)),
+                    }))
+            return classes
+        t = min(timeit.repeat(make_hierarchy, number=1, repeat=3))
+        print
+        print "Class creation -- 1000 classes"
+        print "   Coop:   ", t
+
+    def test_performance_deep_hierarchy(self):
+        import timeit
+        generic   = make_deep_hierarchy(10)
+        generated = make_deep_hierarchy(10, coop.GeneratedCooperative)
+        make = lambda cls: lambda: cls(param='param')
+        t1 = min(timeit.repeat(make(generic), number=self.test_number))
+        t2 = min(timeit.repeat(make(generated), number=self.test_number))
+        print
+        print "Deep hierarchy -- 10 levels"
+        print "   Generic:   ", t1
+        print "   Generated: ", t2
+        print "   Ratio:     ", t2/t1
+
+    def test_performance_init_plan(self):
+        import timeit
+        generic = make_deep_hierarchy(10)
+        planned = make_deep_hierarchy(10, coop.PlannedCooperative)
+        make = lambda cls: lambda: cls(param='param')
+        t1 = min(timeit.repeat(make(generic), number=self.test_number))
+        t2 = min(timeit.repeat(make(planned), number=self.test_number))
+        print
+        print "Init plan -- 10 levels"
+        print "   Generic:   ", t1
+        print "   Planned:   ", t2
+        print "   Ratio:     ", t2/t1
+
+    def test_performance_inner_cooperate(self):
+        import timeit
+        import threading
+        manual = _InnerManualDeriv()
+        obj = _InnerTestDeriv()
+        make = lambda: obj.method(deriv_param='param')
+        t1 = min(timeit.repeat(lambda: manual.method(deriv_param='param'),
+                               number=self.test_number))
+        t2 = min(timeit.repeat(make, number=self.test_number))
+        def run_threads():
+            threads = [threading.Thread(
+                target=lambda: timeit.timeit(make, number=self.test_number))
+                       for i in xrange(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        t3 = min(timeit.repeat(run_threads, number=1, repeat=3))
+        print
+        print "Inner cooperate -- "
+        print "   Manual:    ", t1
+        print "   Coop:      ", t2
+        print "   Ratio:     ", t2/t1
+        print "   4 threads: ", t3, "(%d calls)" % (4 * self.test_number)
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+#
+#  File:       jpb_lazy_conf.py
+#  Author:     Juan Pedro Bolívar Puente <raskolnikov@es.gnu.org>
+#  Date:       Mon Oct 19 10:40:02 2026
+#  Time-stamp: <2026-10-19 10:40:02 jbo>
+#
+
+#
+#  Copyright (C) 2012 Juan Pedro Bolívar Puente
+#
+#  This file is part of jpblib.
+#
+#  jpblib is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  jpblib is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import unittest
+from jpb.conf import *
+from jpb.lazy_conf import *
+import os
+import os.path
+
+SNAPSHOT_TEMP_FILENAME = os.path.join (os.path.dirname (__file__),
+                                       'jpb_lazy_conf_temp_file.bin')
+
+class TestLazyConf (unittest.TestCase):
+
+    class MockBackend (NullBackend):
+        def __init__ (self):
+            self.changed = []
+        def _handle_conf_change (self, node):
+            self.changed.append (node.get_path_name ())
+
+    def setUp (self):
+        conf = ConfNode (name = 'test')
+        conf.path ('a').value = 1
+        conf.path ('b.c').value = 'two'
+        conf.path ('b.d').value = 3.0
+        conf.path ('b.e.f').value = True
+        save_conf_snapshot (conf, SNAPSHOT_TEMP_FILENAME)
+        self.conf = load_conf_snapshot (SNAPSHOT_TEMP_FILENAME)
+
+    def tearDown (self):
+        self.conf.close ()
+        self.conf = None
+        os.remove (SNAPSHOT_TEMP_FILENAME)
+
+    def test_read (self):
+        self.assertEqual (self.conf.name, 'test')
+        self.assertEqual (self.conf.path ('a').value, 1)
+        self.assertEqual (self.conf.path ('b.c').value, 'two')
+        self.assertEqual (self.conf.path ('b.d').value, 3.0)
+        self.assertEqual (self.conf.path ('b.e.f').value, True)
+        self.assertEqual (self.conf.path ('b').value, None)
+        self.assertEqual (self.conf.path ('b.d').get_path_name (),
+                          'test.b.d')
+
+    def test_lazy (self):
+        self.assertEqual (len (self.conf._childs), 0)
+        self.assertTrue (self.conf.has_child ('b'))
+        self.assertFalse (self.conf.has_child ('x'))
+        self.assertEqual (len (self.conf._childs), 0)
+
+        self.conf.path ('b.c')
+        self.assertEqual (self.conf._childs.keys (), ['b'])
+        self.assertEqual (self.conf.child ('b')._childs.keys (), ['c'])
+
+        self.assertEqual (self.conf.to_dict (),
+                          { 'a' : 1,
+                            'b' : { 'c' : 'two',
+                                    'd' : 3.0,
+                                    'e' : { 'f' : True } } })
+
+    def test_write (self):
+        backend = TestLazyConf.MockBackend ()
+        self.conf.set_backend (backend)
+
+        self.conf.path ('b.c').value = 'other'
+        self.conf.path ('b.x').value = 5
+        self.assertEqual (self.conf.path ('b.c').value, 'other')
+        self.assertEqual (self.conf.path ('b.x').value, 5)
+        self.assertEqual (backend.changed, ['test.b.c', 'test.b.x'])
+
+    def test_remove_rename (self):
+        self.conf.child ('b').remove ('c')
+        self.assertFalse (self.conf.child ('b').has_child ('c'))
+        self.assertEqual (self.conf.path ('b.c').value, None)
+
+        self.conf.child ('a').rename ('z')
+        self.assertFalse (self.conf.has_child ('a'))
+        self.assertEqual (self.conf.child ('z').value, 1)
+
+    def test_close (self):
+        self.conf.path ('b.c')
+        self.conf.child ('a')
+        self.conf.close ()
+        self.assertTrue (self.conf.is_materialized ())
+        self.assertEqual (self.conf.path ('b.c').value, 'two')
+        self.assertEqual (self.conf.path ('a').value, 1)
+        self.assertRaises (ConfSnapshotError,
+                           self.conf.child ('b').has_child, 'd')
+        self.assertRaises (ConfSnapshotError, self.conf.path, 'b.d')
+        self.assertRaises (ConfSnapshotError, self.conf.to_dict)
+        self.conf.close ()
+
+    def test_content (self):
+        conf = LazyConfNode ({ 'x' : 1 }, name = 'other')
+        self.assertEqual (conf.to_dict (), { 'x' : 1 })
+        self.assertTrue (conf.is_materialized ())
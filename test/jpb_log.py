@@ -29,6 +29,7 @@ import unittest
 from StringIO import StringIO
 
 from jpb.log import *
+from jpb.log import _policy_node
 
 class TestLog (unittest.TestCase):
 
@@ -54,3 +55,214 @@ class TestLog (unittest.TestCase):
         self.assertEqual (self.info_out.getvalue (), msg_one)
         self.assertEqual (self.error_out.getvalue (), msg_two)
 
+
+    def test_level_filter (self):
+        child = self.node.get_path ('a.b')
+        self.assertTrue (child.is_logging (LOG_INFO))
+        self.assertFalse (child.is_logging (LOG_DEBUG))
+
+        listener = StdLogListener (LOG_WARNING, self.info_out, self.error_out)
+        self.node.disconnect (self.node._destinies [0])
+        self.node.connect (listener)
+        self.assertFalse (child.is_logging (LOG_INFO))
+        self.assertTrue (child.is_logging (LOG_ERROR))
+
+        listener.level = LOG_DEBUG
+        self.assertTrue (child.is_logging (LOG_DEBUG))
+        child.debug ("test")
+        self.assertEqual (self.info_out.getvalue (), "[test.a.b] DEBUG: test\n")
+
+        self.node.disconnect (listener)
+        self.assertFalse (child.is_logging (LOG_FATAL))
+
+    def test_level_filter_other_listeners (self):
+        child = self.node.get_path ('a.b')
+        messages = []
+        child.on_message += lambda node, level, msg: messages.append (msg)
+        self.assertTrue (child.is_logging (LOG_DEBUG))
+        self.assertFalse (self.node.is_logging (LOG_DEBUG))
+
+        child.debug ("test")
+        self.assertEqual (messages, ["test"])
+        self.assertEqual (self.info_out.getvalue (), "")
+
+        other = LogNode ()
+        other.adopt (child)
+        self.assertFalse (other.is_logging (LOG_DEBUG))
+        self.assertTrue (child.is_logging (LOG_DEBUG))
+        child.on_message.clear ()
+        self.assertFalse (child.is_logging (LOG_FATAL))
+
+    def test_lazy_format (self):
+        child = self.node.get_path ('a.b')
+        calls = []
+        def thunk ():
+            calls.append (1)
+            return "thunk"
+
+        child.info ("%s %d", "test", 1)
+        child.log (LOG_INFO, thunk)
+        child.debug (thunk)
+        child.debug ("%s", None.__class__)
+        child.info ("100%")
+
+        self.assertEqual (calls, [1])
+        self.assertEqual (self.info_out.getvalue (),
+                          "[test.a.b] INFO: test 1\n"
+                          "[test.a.b] INFO: thunk\n"
+                          "[test.a.b] INFO: 100%\n")
+
+    def test_deferred_format (self):
+        class Recorder (RecordLogListener):
+            def __init__ (self):
+                super (Recorder, self).__init__ (LOG_DEBUG)
+                self.messages = []
+            def on_message (self, node, level, msg):
+                self.messages.append (msg)
+
+        child = self.node.get_path ('a.b')
+        recorder = Recorder ()
+        child.connect (recorder)
+        child.debug ("%s %d", "test", 1)
+        child.debug ("%s", None.__class__)
+        child.info ("%s %d", "test", 2)
+
+        deferred, formatted, shared = recorder.messages
+        self.assertTrue (isinstance (deferred, LogMessage))
+        self.assertEqual ((deferred.fmt, deferred.args), ("%s %d", ("test", 1)))
+        self.assertEqual (formatted, "<type 'NoneType'>")
+        self.assertEqual (shared, "test 2")
+        self.assertEqual (LogRecord.from_message (child, LOG_DEBUG,
+                                                  deferred).msg, "test 1")
+
+    def test_suppress_duplicates (self):
+        child = self.node.get_path ('a.b')
+        child.set_limits (suppress_duplicates = True)
+        for i in range (4):
+            child.info ("same %d", 1)
+        child.info ("other")
+        child.info ("other")
+
+        self.assertEqual (self.info_out.getvalue (),
+                          "[test.a.b] INFO: same 1\n"
+                          "[test.a.b] INFO: Last message repeated 3 times\n"
+                          "[test.a.b] INFO: other\n")
+
+    def test_suppress_duplicates_callable (self):
+        child = self.node.get_path ('a.b')
+        child.set_limits (suppress_duplicates = True)
+        messages = iter (["one", "two"])
+        thunk = lambda: messages.next ()
+        child.info ("same")
+        child.info ("same")
+        child.info (thunk)
+        child.info (thunk)
+
+        self.assertEqual (self.info_out.getvalue (),
+                          "[test.a.b] INFO: same\n"
+                          "[test.a.b] INFO: Last message repeated 1 times\n"
+                          "[test.a.b] INFO: one\n"
+                          "[test.a.b] INFO: two\n")
+
+    def test_rate_limit (self):
+        import jpb.log
+        clock = [100.0]
+        old_now = jpb.log._now
+        jpb.log._now = lambda: clock [0]
+        try:
+            child = self.node.get_path ('a.b')
+            child.set_limits (rate = 1, burst = 2)
+            for i in range (5):
+                child.info ("msg %d", i)
+            clock [0] += 1.0
+            child.info ("late")
+        finally:
+            jpb.log._now = old_now
+
+        self.assertEqual (self.info_out.getvalue (),
+                          "[test.a.b] INFO: msg 0\n"
+                          "[test.a.b] INFO: msg 1\n"
+                          "[test.a.b] INFO: late\n")
+        self.assertEqual (self.error_out.getvalue (),
+                          "[test.a.b] WARNING: "
+                          "3 messages suppressed by rate limit\n")
+
+        child.set_limits ()
+        self.assertTrue (child._limiter is None)
+
+    def test_rate_limit_duplicates (self):
+        import jpb.log
+        clock = [100.0]
+        old_now = jpb.log._now
+        jpb.log._now = lambda: clock [0]
+        try:
+            child = self.node.get_path ('a.b')
+            child.set_limits (rate = 1, burst = 1, suppress_duplicates = True)
+            child.info ("first")
+            child.info ("second")
+            child.info ("second")
+            clock [0] += 1.0
+            child.info ("second")
+        finally:
+            jpb.log._now = old_now
+
+        self.assertEqual (self.info_out.getvalue (),
+                          "[test.a.b] INFO: first\n"
+                          "[test.a.b] INFO: second\n")
+        self.assertEqual (self.error_out.getvalue (),
+                          "[test.a.b] WARNING: "
+                          "2 messages suppressed by rate limit\n")
+
+    def test_configure_log (self):
+        from jpb.conf import ConfNode
+        conf = ConfNode ({ 'a' : { 'b' : { 'suppress_duplicates' : True },
+                                   'rate_limit' : 10,
+                                   'level'      : 'warning' } })
+        configure_log (conf, self.node)
+        self.assertEqual (self.node.get_path ('a')._policy_level, LOG_WARNING)
+        self.assertFalse (self.node.get_path ('a.b').is_logging (LOG_INFO))
+        self.assertEqual (self.node.get_path ('a')._limiter.rate, 10)
+        self.assertTrue (self.node.get_path ('a.b')._limiter.suppress_duplicates)
+        self.assertTrue (self.node._limiter is None)
+
+    def test_level_policy (self):
+        self.node.disconnect (self.node._destinies [0])
+        self.node.connect (StdLogListener (LOG_DEBUG,
+                                           self.info_out,
+                                           self.error_out))
+        db = self.node.get_path ('db.query')
+        ui = self.node.get_path ('ui')
+
+        self.node.set_level (LOG_INFO)
+        _policy_node ('db.*', self.node).set_level (LOG_DEBUG)
+        self.assertTrue (db.is_logging (LOG_DEBUG))
+        self.assertFalse (ui.is_logging (LOG_DEBUG))
+        self.assertTrue (ui.is_logging (LOG_INFO))
+
+        db.debug ("one")
+        ui.debug ("two")
+        self.assertEqual (self.info_out.getvalue (),
+                          "[test.db.query] DEBUG: one\n")
+
+        self.node.get_path ('db').set_level (None)
+        self.assertFalse (db.is_logging (LOG_DEBUG))
+
+    def test_sampling (self):
+        import jpb.log
+        values = iter ([0.1, 0.9, 0.3, 0.6])
+        old_random = jpb.log._random
+        jpb.log._random = lambda: values.next ()
+        try:
+            child = self.node.get_path ('a.b')
+            _policy_node ('a', self.node).set_sampling (0.5)
+            for i in range (4):
+                child.info ("msg %d", i)
+            self.node.get_path ('a').set_sampling (1)
+            child.info ("msg 4")
+        finally:
+            jpb.log._random = old_random
+
+        self.assertEqual (self.info_out.getvalue (),
+                          "[test.a.b] INFO: msg 0\n"
+                          "[test.a.b] INFO: msg 2\n"
+                          "[test.a.b] INFO: msg 4\n")
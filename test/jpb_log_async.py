@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+#
+#  File:       jpb_log_async.py
+#  Author:     Juan Pedro Bolívar Puente <raskolnikov@es.gnu.org>
+#  Date:       Mon Oct 19 11:58:21 2026
+#  Time-stamp: <2026-10-19 11:58:21 jbo>
+#
+
+#
+#  Copyright (C) 2012 Juan Pedro Bolívar Puente
+#
+#  This file is part of jpblib.
+#
+#  jpblib is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  jpblib is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import unittest
+import threading
+from StringIO import StringIO
+
+from jpb.log import *
+from jpb.log_async import *
+
+class BlockingOutput (object):
+
+    def __init__ (self):
+        self.lines = []
+        self.writes = 0
+        self.event = threading.Event ()
+
+    def write (self, data):
+        self.event.wait ()
+        self.writes += 1
+        self.lines.extend (data.splitlines ())
+
+    def flush (self):
+        pass
+
+
+class TestAsyncLog (unittest.TestCase):
+
+    def setUp (self):
+        self.node = LogNode ()
+        self.node.name = "test"
+
+    def test_message (self):
+        info_out  = StringIO ()
+        error_out = StringIO ()
+        listener = AsyncLogListener (LOG_INFO, info_out, error_out)
+        self.node.connect (listener)
+
+        self.node.get_path ('a.b').log (LOG_INFO, "test one")
+        self.node.get_path ('a.b').log (LOG_FATAL, "test two")
+        self.node.get_path ('a.b').log (LOG_DEBUG, "test three")
+        listener.flush ()
+
+        self.assertEqual (info_out.getvalue (), "[test.a.b] INFO: test one\n")
+        self.assertEqual (error_out.getvalue (),
+                          "[test.a.b] FATAL: test two\n")
+        listener.close ()
+
+    def test_batching (self):
+        out = BlockingOutput ()
+        listener = AsyncLogListener (LOG_INFO, out, out)
+        self.node.connect (listener)
+
+        for i in xrange (100):
+            self.node.info ("%d", i)
+        out.event.set ()
+        listener.close ()
+
+        self.assertEqual (out.lines,
+                          ["[test] INFO: %d" % i for i in xrange (100)])
+        self.assertTrue (out.writes < 100)
+
+        self.node.info ("ignored")
+        self.assertEqual (len (out.lines), 100)
+
+    def test_drop (self):
+        out = BlockingOutput ()
+        listener = AsyncLogListener (LOG_INFO, out, out,
+                                     capacity = 10,
+                                     policy = LOG_QUEUE_DROP)
+        self.node.connect (listener)
+
+        for i in xrange (100):
+            self.node.info ("%d", i)
+        out.event.set ()
+        listener.close ()
+
+        self.assertTrue (listener.dropped > 0)
+        self.assertEqual (len (out.lines) + listener.dropped, 100)
+
+    def test_close_while_logging (self):
+        out = StringIO ()
+        listener = AsyncLogListener (LOG_INFO, out, out, capacity = 10)
+        self.node.connect (listener)
+
+        def log ():
+            for i in xrange (200):
+                self.node.info ("%d", i)
+        threads = [ threading.Thread (target = log) for i in xrange (4) ]
+        for thread in threads:
+            thread.start ()
+        listener.close ()
+        for thread in threads:
+            thread.join ()
+
+        done = threading.Event ()
+        def flush ():
+            listener.flush ()
+            done.set ()
+        flusher = threading.Thread (target = flush)
+        flusher.daemon = True
+        flusher.start ()
+        done.wait (5)
+        self.assertTrue (done.is_set ())
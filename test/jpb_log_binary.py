@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#
+#  File:       jpb_log_binary.py
+#  Author:     Juan Pedro Bolívar Puente <raskolnikov@es.gnu.org>
+#  Date:       Mon Oct 19 13:58:40 2026
+#  Time-stamp: <2026-10-19 13:58:40 jbo>
+#
+
+#
+#  Copyright (C) 2012 Juan Pedro Bolívar Puente
+#
+#  This file is part of jpblib.
+#
+#  jpblib is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  jpblib is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import unittest
+import tempfile
+import shutil
+import os.path
+
+from jpb.log import *
+from jpb.log_binary import *
+
+class TestBinaryLog (unittest.TestCase):
+
+    def setUp (self):
+        self.folder = tempfile.mkdtemp ()
+        self.fname  = os.path.join (self.folder, 'messages.blog')
+        self.node = LogNode ()
+        self.node.name = 'test'
+        self.listener = BinaryLogListener (self.fname, LOG_DEBUG)
+        self.node.connect (self.listener)
+
+    def tearDown (self):
+        self.listener.close ()
+        shutil.rmtree (self.folder)
+
+    def log_messages (self):
+        self.node.path ('a.b').debug ('one %d', 1)
+        self.node.path ('a').error ('two')
+        self.node.path ('ab').info (u'thr\xe9e')
+        self.node.info ('four')
+        self.listener.flush ()
+
+    def test_read (self):
+        self.log_messages ()
+        records = list (read_log_records (self.fname))
+
+        self.assertEqual ([r.format () for r in records],
+                          [u'[test.a.b] DEBUG: one 1\n',
+                           u'[test.a] ERROR: two\n',
+                           u'[test.ab] INFO: thr\xe9e\n',
+                           u'[test] INFO: four\n'])
+        self.assertEqual (records [1].level, LOG_ERROR)
+        self.assertTrue (records [0].time <= records [3].time)
+        self.assertEqual (records [0].thread, LogRecord ('', None, '').thread)
+
+    def test_filter (self):
+        self.log_messages ()
+
+        self.assertEqual ([r.msg for r in read_log_records (
+            self.fname, prefix = 'test.a')], ['one 1', 'two'])
+        self.assertEqual ([r.msg for r in read_log_records (
+            self.fname, level = LOG_INFO)], ['two', u'thr\xe9e', 'four'])
+        self.assertEqual ([r.msg for r in read_log_records (
+            self.fname, prefix = 'test.a', level = LOG_WARNING)], ['two'])
+
+    def test_unformatted (self):
+        self.node.info ('%s %d %r %.1f %s %s', u'\xe9', 1 << 70, 'x', 0.25,
+                        None, True)
+        self.listener.flush ()
+        record, = read_log_records (self.fname)
+        self.assertEqual (record.fmt, '%s %d %r %.1f %s %s')
+        self.assertEqual (record.args, (u'\xe9', 1 << 70, 'x', 0.25,
+                                        None, True))
+        self.assertEqual (record.msg, u'\xe9 %d \'x\' 0.2 None True'
+                          % (1 << 70))
+
+    def test_append (self):
+        self.log_messages ()
+        self.node.disconnect (self.listener)
+        self.listener.close ()
+        self.listener = BinaryLogListener (self.fname, LOG_DEBUG)
+        self.node.connect (self.listener)
+        self.node.path ('x').warning ('five')
+        self.listener.flush ()
+
+        self.assertEqual ([r.path for r in read_log_records (self.fname)],
+                          ['test.a.b', 'test.a', 'test.ab', 'test', 'test.x'])
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+#
+#  File:       jpb_log_mp.py
+#  Author:     Juan Pedro Bolívar Puente <raskolnikov@es.gnu.org>
+#  Date:       Mon Oct 19 14:05:51 2026
+#  Time-stamp: <2026-10-19 14:05:51 jbo>
+#
+
+#
+#  Copyright (C) 2012 Juan Pedro Bolívar Puente
+#
+#  This file is part of jpblib.
+#
+#  jpblib is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  jpblib is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import unittest
+import multiprocessing
+from Queue import Queue
+from StringIO import StringIO
+
+from jpb.log import *
+from jpb.log_mp import *
+
+def child_main (queue, index):
+    setup_child_log (queue)
+    for i in xrange (50):
+        GlobalLog ().path ('worker.%d' % index).info ("%d", i)
+    GlobalLog ().warning ("done")
+
+
+class TestMultiprocessLog (unittest.TestCase):
+
+    def setUp (self):
+        self.info_out  = StringIO ()
+        self.error_out = StringIO ()
+        self.node = LogNode ()
+        self.node.name = "parent"
+        self.node.connect (StdLogListener (LOG_INFO,
+                                           self.info_out,
+                                           self.error_out))
+
+    def test_processes (self):
+        collector = LogCollector (self.node)
+        procs = [ multiprocessing.Process (target = child_main,
+                                           args = (collector.queue, i))
+                  for i in xrange (3) ]
+        for proc in procs:
+            proc.start ()
+        for proc in procs:
+            proc.join ()
+        collector.close ()
+
+        lines = self.info_out.getvalue ().splitlines ()
+        self.assertEqual (len (lines), 150)
+        for i in xrange (3):
+            self.assertEqual (
+                [ l for l in lines if l.startswith ('[parent.worker.%d]' % i) ],
+                [ '[parent.worker.%d] INFO: %d' % (i, j) for j in xrange (50) ])
+        self.assertEqual (self.error_out.getvalue (),
+                          "[parent] WARNING: done\n" * 3)
+
+    def test_listener (self):
+        collector = LogCollector (self.node)
+        other = LogNode ()
+        other.name = "other"
+        other.connect (collector.listener (LOG_INFO))
+        other.get_path ('a.b').info ("one")
+        other.get_path ('a.b').debug ("two")
+        collector.close ()
+
+        self.assertEqual (self.info_out.getvalue (),
+                          "[parent.a.b] INFO: one\n")
+
+    def test_setup_child_log (self):
+        node = GlobalLog ().get_path ('test_setup_child_log.a')
+        node.connect (StdLogListener (LOG_INFO, self.info_out,
+                                      self.error_out))
+        messages = []
+        node.on_message += lambda node, level, msg: messages.append (msg)
+
+        queue = Queue ()
+        listener = setup_child_log (queue)
+        try:
+            node.info ("child")
+            self.assertEqual (self.info_out.getvalue (), "")
+            self.assertEqual (messages, [])
+            self.assertEqual (queue.get_nowait ().msg, "child")
+        finally:
+            GlobalLog ().disconnect (listener)
+            GlobalLog ().remove ('test_setup_child_log')
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+#
+#  File:       jpb_log_performance.py
+#  Author:     Juan Pedro Bolívar Puente <raskolnikov@es.gnu.org>
+#  Date:       Mon Oct 19 16:02:13 2026
+#  Time-stamp: <2026-10-19 16:02:13 jbo>
+#
+
+#
+#  Copyright (C) 2012 Juan Pedro Bolívar Puente
+#
+#  This file is part of jpblib.
+#
+#  jpblib is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  jpblib is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import os
+import tempfile
+import unittest
+from timeit import default_timer as timer
+from StringIO import StringIO
+
+import jpb.log
+from jpb.log import *
+
+def measure (func, number):
+    """
+    Calls 'func' 'number' times and returns the number of calls per
+    second and the 50th, 90th and 99th percentiles of the latency of
+    one call, in microseconds.
+    """
+    samples = []
+    start = timer ()
+    for i in xrange (number):
+        t = timer ()
+        func ()
+        samples.append (timer () - t)
+    total = timer () - start
+
+    samples.sort ()
+    percentile = lambda p: samples [int (p * (number - 1))] * 1e6
+    return number / total, percentile (0.5), percentile (0.9), \
+           percentile (0.99)
+
+def report (name, result):
+    print "   %-28s %10.0f msg/s   p50 %6.2f  p90 %6.2f  p99 %6.2f us" % \
+          ((name,) + result)
+
+
+class TestLogPerformance (unittest.TestCase):
+
+    number = 2000
+    depths = (1, 4, 7, 10)
+
+    def setUp (self):
+        self.root = GlobalLog ().child ('benchmark')
+        self.null = open (os.devnull, 'w')
+        fd, self.fname = tempfile.mkstemp ()
+        os.close (fd)
+        self.file = open (self.fname, 'w')
+        self.listeners = []
+
+    def tearDown (self):
+        for node, listener in self.listeners:
+            node.disconnect (listener)
+        GlobalLog ().remove ('benchmark')
+        self.null.close ()
+        self.file.close ()
+        os.remove (self.fname)
+
+    def listen (self, node, out, level = LOG_INFO):
+        listener = StdLogListener (level, out, out)
+        node.connect (listener)
+        self.listeners.append ((node, listener))
+
+    def path_name (self, depth):
+        return '.'.join (['benchmark'] + [ 'n%d' % i
+                                           for i in xrange (depth - 1) ])
+
+    def test_performance_entry_points (self):
+        path = self.path_name (4)
+        self.listen (self.root, self.null)
+        node = get_log (path)
+
+        print
+        print "Log entry points -- depth 4, /dev/null"
+        report ("GlobalLog ().path ()", measure (
+            lambda: GlobalLog ().path (path).info ("message %d", 1),
+            self.number))
+        report ("jpb.log.log ()", measure (
+            lambda: jpb.log.log (path, LOG_INFO, "message %d", 1),
+            self.number))
+        report ("cached get_log ()", measure (
+            lambda: node.info ("message %d", 1), self.number))
+
+    def test_performance_depth (self):
+        self.listen (self.root, self.null)
+
+        print
+        print "Log depth -- /dev/null"
+        for depth in self.depths:
+            node = get_log (self.path_name (depth))
+            report ("accepted, depth %d" % depth, measure (
+                lambda: node.info ("message %d", 1), self.number))
+            report ("filtered, depth %d" % depth, measure (
+                lambda: node.debug ("message %d", 1), self.number))
+
+    def test_performance_listeners (self):
+        depth = 7
+        node = get_log (self.path_name (depth))
+
+        print
+        print "Log listeners per level -- depth", depth, "/dev/null"
+        for count in (1, 2, 4):
+            curr = node
+            while curr is not GlobalLog ():
+                for i in xrange (count - len (curr._destinies)):
+                    self.listen (curr, self.null)
+                curr = curr.parent ()
+            report ("%d per level, accepted" % count, measure (
+                lambda: node.info ("message %d", 1), self.number))
+            report ("%d per level, filtered" % count, measure (
+                lambda: node.debug ("message %d", 1), self.number))
+
+    def test_performance_sinks (self):
+        node = get_log (self.path_name (4))
+        sinks = (("/dev/null", self.null),
+                 ("file",      self.file),
+                 ("StringIO",  StringIO ()))
+
+        print
+        print "Log sinks -- depth 4"
+        for name, out in sinks:
+            self.listen (self.root, out)
+            report (name, measure (
+                lambda: node.info ("message %d", 1), self.number))
+            listener = self.listeners.pop ()
+            self.root.disconnect (listener [1])
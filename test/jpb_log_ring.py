@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+#
+#  File:       jpb_log_ring.py
+#  Author:     Juan Pedro Bolívar Puente <raskolnikov@es.gnu.org>
+#  Date:       Mon Oct 19 15:20:44 2026
+#  Time-stamp: <2026-10-19 15:20:44 jbo>
+#
+
+#
+#  Copyright (C) 2012 Juan Pedro Bolívar Puente
+#
+#  This file is part of jpblib.
+#
+#  jpblib is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  jpblib is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import os
+import tempfile
+import unittest
+
+from jpb.log import *
+from jpb.log_ring import *
+from jpb.error import LoggableError
+
+class TestRingBufferLog (unittest.TestCase):
+
+    def setUp (self):
+        self.node = LogNode ()
+        self.node.name = "test"
+
+    def test_records (self):
+        listener = RingBufferLogListener (4)
+        self.node.get_path ('a').connect (listener)
+        self.assertTrue (self.node.get_path ('a.b').is_logging (LOG_DEBUG))
+        self.assertFalse (self.node.is_logging (LOG_DEBUG))
+
+        for i in xrange (3):
+            self.node.get_path ('a.b').debug ("%d", i)
+        self.node.info ("ignored")
+        self.assertEqual ([ r.msg for r in listener.records () ],
+                          ["0", "1", "2"])
+
+        for i in xrange (3, 10):
+            self.node.get_path ('a').info ("%d", i)
+        records = listener.records ()
+        self.assertEqual ([ r.msg for r in records ], ["6", "7", "8", "9"])
+        self.assertEqual (records [0].path, "test.a")
+        self.assertEqual (records [0].level, LOG_INFO)
+
+        listener.clear ()
+        self.assertEqual (listener.records (), [])
+        self.node.get_path ('a').info ("after")
+        self.assertEqual ([ r.msg for r in listener.records () ], ["after"])
+
+    def test_late_writer (self):
+        listener = RingBufferLogListener (1)
+        self.node.connect (listener)
+        # The thread that drew index 0 stores after the one that drew 1.
+        listener._counter = iter ([ 1, 0 ])
+        self.node.info ("newer")
+        self.node.info ("older")
+        self.assertEqual ([ r.msg for r in listener.records () ], ["newer"])
+
+    def test_dump (self):
+        fd, fname = tempfile.mkstemp ()
+        os.close (fd)
+        try:
+            listener = RingBufferLogListener (8, fname = fname)
+            self.node.connect (listener)
+            self.node.debug ("context")
+            LoggableError ("crash", LOG_FATAL).log ()
+            self.node.disconnect (listener)
+
+            lines = open (fname).read ().splitlines ()
+            self.assertEqual (len (lines), 1)
+            self.assertTrue (lines [0].endswith ("[test] DEBUG: context"))
+        finally:
+            os.remove (fname)
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+#
+#  File:       jpb_log_rotate.py
+#  Author:     Juan Pedro Bolívar Puente <raskolnikov@es.gnu.org>
+#  Date:       Mon Oct 19 12:51:10 2026
+#  Time-stamp: <2026-10-19 12:51:10 jbo>
+#
+
+#
+#  Copyright (C) 2012 Juan Pedro Bolívar Puente
+#
+#  This file is part of jpblib.
+#
+#  jpblib is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  jpblib is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import unittest
+import tempfile
+import shutil
+import gzip
+import os
+import os.path
+
+from jpb.log import *
+from jpb.log_rotate import *
+
+class TestRotatingFile (unittest.TestCase):
+
+    def setUp (self):
+        self.folder = tempfile.mkdtemp ()
+        self.fname  = os.path.join (self.folder, 'messages.log')
+
+    def tearDown (self):
+        shutil.rmtree (self.folder)
+
+    def test_rotate_size (self):
+        out = RotatingFile (self.fname, max_bytes = 10, backup_count = 2)
+        for i in xrange (5):
+            out.write ('0123456789')
+        out.write ('last')
+        out.close ()
+
+        rotated = out.rotated_files ()
+        self.assertEqual ([seq for seq, name in rotated], [4, 5])
+        for seq, name in rotated:
+            self.assertTrue (name.endswith ('.gz'))
+            self.assertEqual (gzip.open (name).read (), '0123456789')
+        self.assertEqual (open (self.fname).read (), 'last')
+
+    def test_rotate_on_open (self):
+        out = RotatingFile (self.fname, compress = False)
+        out.write ('first')
+        out.close ()
+
+        out = RotatingFile (self.fname, compress = False,
+                            rotate_on_open = True)
+        out.write ('second')
+        out.close ()
+
+        rotated = out.rotated_files ()
+        self.assertEqual (len (rotated), 1)
+        self.assertEqual (open (rotated [0][1]).read (), 'first')
+        self.assertEqual (open (self.fname).read (), 'second')
+
+    def test_rotate_time (self):
+        out = RotatingFile (self.fname, interval = 60, compress = False)
+        out.write ('first')
+        out._rotate_time = 0
+        out.write ('second')
+        out.close ()
+
+        self.assertEqual (len (out.rotated_files ()), 1)
+        self.assertEqual (open (self.fname).read (), 'second')
+
+    def test_listener (self):
+        node = LogNode ()
+        node.name = 'test'
+        listener = RotatingFileLogListener (self.fname, max_bytes = 1)
+        node.connect (listener)
+        node.info ('one')
+        node.debug ('two')
+        node.error ('three')
+        listener.close ()
+
+        rotated = listener.info_output.rotated_files ()
+        self.assertEqual ([gzip.open (name).read () for seq, name in rotated],
+                          ['[test] INFO: one\n', '[test] ERROR: three\n'])
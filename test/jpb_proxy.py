@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+#
+#  File:       jpb_proxy.py
+#  Author:     Juan Pedro Bolívar Puente <raskolnikov@es.gnu.org>
+#  Date:       Mon Oct 19 18:02:37 2026
+#  Time-stamp: <2026-10-19 18:02:37 jbo>
+#
+
+#
+#  Copyright (C) 2012 Juan Pedro Bolívar Puente
+#
+#  This file is part of jpblib.
+#
+#  jpblib is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  jpblib is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import unittest
+
+from jpb.proxy import *
+from jpb.signal import *
+from jpb.sender import *
+
+class Proxied (object):
+
+    def __init__ (self):
+        self.value = 1
+        self.items = [1, 2, 3]
+
+    def method (self, x, y = 0):
+        return self.value + x + y
+
+    def __len__ (self):
+        return len (self.items)
+
+
+class TestFastAutoProxy (unittest.TestCase):
+
+    def test_forwarding (self):
+        obj = Proxied ()
+        proxy = FastAutoProxy (obj)
+        self.assertEqual (proxy.method (1, y = 2), 4)
+        self.assertEqual (len (proxy), 3)
+        self.assertEqual (proxy.value, 1)
+        self.assertTrue (proxy.proxied is obj)
+        self.assertTrue ('method' in type (proxy).__dict__)
+
+    def test_class_per_type (self):
+        self.assertTrue (type (FastAutoProxy (Proxied ())) is
+                         type (FastAutoProxy (Proxied ())))
+
+    def test_attribute_cache (self):
+        class CachingProxy (FastAutoProxy):
+            cache_attributes = True
+        obj = Proxied ()
+        proxy = CachingProxy (obj)
+        self.assertEqual (proxy.value, 1)
+        obj.value = 2
+        self.assertEqual (proxy.value, 1)
+        self.assertEqual (proxy.method (0), 2)
+        proxy.invalidate ('value')
+        self.assertEqual (proxy.value, 2)
+        obj.value = 3
+        proxy.invalidate ()
+        self.assertEqual (proxy.value, 3)
+
+    def test_no_cache (self):
+        obj = Proxied ()
+        proxy = FastAutoProxy (obj)
+        self.assertEqual (proxy.value, 1)
+        obj.value = 2
+        self.assertEqual (proxy.value, 2)
+
+
+class TestProxyPerformance (unittest.TestCase):
+
+    test_number = 1 << 12
+
+    def test_performance_notify (self):
+        import timeit
+        class SlowSenderSignalProxy (AutoProxy):
+            def __init__ (self, signal, sender, message):
+                super (SlowSenderSignalProxy, self).__init__ (signal)
+                self._sender  = sender
+                self._message = message
+            def notify (self, *args, **kws):
+                self.proxied.notify (*args, **kws)
+                self._sender.send (self._message, *args, **kws)
+
+        signal = Signal ()
+        signal += lambda x: x
+        sender = Sender ()
+        slow = SlowSenderSignalProxy (signal, sender, 'signal')
+        fast = SenderSignalProxy (signal, sender, 'signal')
+
+        t1 = min (timeit.repeat (lambda: signal.notify (1),
+                                 number = self.test_number))
+        t2 = min (timeit.repeat (lambda: slow.notify (1),
+                                 number = self.test_number))
+        t3 = min (timeit.repeat (lambda: fast.notify (1),
+                                 number = self.test_number))
+        t4 = min (timeit.repeat (lambda: slow.connect,
+                                 number = self.test_number))
+        t5 = min (timeit.repeat (lambda: fast.connect,
+                                 number = self.test_number))
+        print
+        print "Proxy notify -- "
+        print "   Direct:     ", t1
+        print "   AutoProxy:  ", t2
+        print "   Fast:       ", t3
+        print "   Ratio:      ", t3 / t2
+        print "Proxy method lookup -- "
+        print "   AutoProxy:  ", t4
+        print "   Fast:       ", t5
+        print "   Ratio:      ", t5 / t4
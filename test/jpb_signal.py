@@ -32,6 +32,18 @@ from jpb.meta import mixin
 
 CleverSlot = mixin (Trackable, Slot)
 
+class _SignalSenderGet (AutoSignalSenderGet):
+    def __init__ (self):
+        AutoSignalSenderGet.__init__ (self)
+        self.signal = Signal ()
+
+class _SignalReceiver (Receiver):
+    def __init__ (self):
+        Receiver.__init__ (self)
+        self.values = []
+    def signal (self, value):
+        self.values.append (value)
+
 class TestSignalSlot (unittest.TestCase):
 
     class Counter (object):
@@ -206,3 +218,89 @@ class TestSignalSlot (unittest.TestCase):
 
 
 
+
+    def test_auto_forward_get_cache (self):
+        class Tester (AutoSignalSenderGet):
+            def __init__ (self):
+                AutoSignalSenderGet.__init__ (self)
+                self.signal = Signal ()
+                self.value = 0
+            @signal
+            def decorated (self):
+                pass
+
+        obj = Tester ()
+        self.assertTrue (obj.signal is obj.signal)
+        self.assertTrue (isinstance (obj.signal, SenderSignalProxy))
+        self.assertTrue (obj.decorated is obj.decorated)
+        self.assertEqual (obj.value, 0)
+
+        old = obj.signal
+        obj.signal = Signal ()
+        self.assertFalse (obj.signal is old)
+        self.assertTrue (obj.signal.proxied is obj.__dict__ ['signal'])
+
+        obj.signal = None
+        self.assertTrue (obj.signal is None)
+        obj.other = Signal ()
+        self.assertTrue (isinstance (obj.other, SenderSignalProxy))
+
+    def test_auto_forward_get_no_leak (self):
+        import gc
+        class Tester (AutoSignalSenderGet):
+            def __init__ (self):
+                AutoSignalSenderGet.__init__ (self)
+                self.signal = Signal ()
+
+        gc.collect ()
+        garbage = len (gc.garbage)
+        for i in xrange (10):
+            obj = Tester ()
+            obj.signal (1)
+        del obj
+        gc.collect ()
+        self.assertEqual (len (gc.garbage), garbage)
+
+    def test_auto_forward_get_copy (self):
+        import copy
+        import pickle
+        obj = _SignalSenderGet ()
+        obj.signal (0)
+        dup = copy.copy (obj)
+        orig_receiver = _SignalReceiver ()
+        dup_receiver  = _SignalReceiver ()
+        obj.connect (orig_receiver)
+        dup.connect (dup_receiver)
+        dup.signal (1)
+        self.assertEqual (orig_receiver.values, [])
+        self.assertEqual (dup_receiver.values, [1])
+
+        loaded = pickle.loads (pickle.dumps (obj, 2))
+        self.assertTrue (isinstance (loaded.signal, SenderSignalProxy))
+        loaded.connect (dup_receiver)
+        loaded.signal (2)
+        self.assertEqual (dup_receiver.values, [1, 2])
+        self.assertEqual (orig_receiver.values, [])
+
+
+class TestSignalPerformance (unittest.TestCase):
+
+    test_number = 1 << 12
+
+    def test_performance_auto_signal_sender_get (self):
+        import timeit
+        class Tester (AutoSignalSenderGet):
+            def __init__ (self):
+                AutoSignalSenderGet.__init__ (self)
+                self.signal = Signal ()
+                self.value = 0
+
+        obj = Tester ()
+        t1 = min (timeit.repeat (lambda: obj.signal (),
+                                 number = self.test_number))
+        t2 = min (timeit.repeat (lambda: obj.value,
+                                 number = self.test_number))
+        print
+        print "AutoSignalSenderGet -- "
+        print "   Signal call: ", t1
+        print "   Attribute:   ", t2
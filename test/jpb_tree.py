@@ -71,6 +71,57 @@ class TestAutoTree (unittest.TestCase):
         self.assertEqual (self._tree_1.path ('a.b.c').value, None)
         self.assertEqual (self._tree_1.path ('d.b.c').value, 2)
 
+    def test_path_cache (self):
+        child = self._tree_1.path ('a.b.c')
+        self.assertTrue (self._tree_1.path ('a.b.c') is child)
+
+        self._tree_1.path ('a.b').rename ('d')
+        self.assertTrue (self._tree_1.path ('a.d.c') is child)
+        self.assertTrue (self._tree_1.path ('a.b.c') is not child)
+
+        self._tree_1.child ('a').remove ('d')
+        self.assertTrue (self._tree_1.path ('a.d.c') is not child)
+
+        self._tree_1.child ('x').adopt (child)
+        self.assertTrue (self._tree_1.path ('x.c') is child)
+
+    def test_path_name_cache (self):
+        child = self._tree_1.path ('a.b.c')
+        self.assertEqual (child.get_path_name (), '.a.b.c')
+        self.assertEqual (child.get_path_list (), ['', 'a', 'b', 'c'])
+
+        subtree = TestAutoTree.ValueTree ()
+        subtree.path ('x.y')
+        self.assertEqual (subtree.path ('x.y').get_path_name (), '.x.y')
+        self._tree_1.adopt (subtree, 's')
+        self.assertEqual (subtree.path ('x.y').get_path_name (), '.s.x.y')
+
+        self._tree_1.child ('d').adopt (self._tree_1.path ('a.b'))
+        self.assertEqual (child.get_path_name (), '.d.b.c')
+        self._tree_1.child ('d').remove ('b')
+        self.assertEqual (child.get_path_name (), '.c')
+        self.assertEqual (child.get_path_list (['x']), ['x', '', 'c'])
+        self._tree_1.child ('x').adopt (child.parent (), 'b')
+        self.assertEqual (child.get_path_name (), '.x.b.c')
+
+    def test_cache_per_tree (self):
+        other = TestAutoTree.ValueTree ()
+        child = other.path ('x.y')
+        cache = other._path_cache
+        self.assertEqual (child.get_path_name (), '.x.y')
+
+        self._tree_1.child ('a').rename ('d')
+        self.assertTrue (other._path_cache is cache)
+        self.assertEqual (child._path_name_generation,
+                          other._tree_generation [0])
+
+        moved = self._tree_1.child ('d').remove ('b')
+        other.child ('x').adopt (moved, 'b')
+        self.assertEqual (moved.child ('c').get_path_name (), '.x.b.c')
+        other.child ('x').rename ('z')
+        self.assertEqual (moved.child ('c').get_path_name (), '.z.b.c')
+        self.assertTrue (other.path ('z.b.c') is moved.child ('c'))
+
     def test_events (self):
         tree = TestAutoTree.CountingTree ();
 
@@ -100,5 +151,84 @@ class TestAutoTree (unittest.TestCase):
         self.assertEqual (list_pre, ["", "a", "b", "c"])
         self.assertEqual (list_post, ["c", "b", "a", ""])
 
+    def test_iterators (self):
+        tree = TestAutoTree.ValueTree ()
+        tree.path ('a.b')
+        tree.path ('a.c')
+        tree.path ('d.e')
 
-
+        names = lambda nodes: [x.get_name () for x in nodes]
+        list_pre  = []
+        list_post = []
+        tree.dfs_preorder (lambda x: list_pre.append (x.get_name ()))
+        tree.dfs_postorder (lambda x: list_post.append (x.get_name ()))
+
+        self.assertEqual (names (tree.iter_preorder ()), list_pre)
+        self.assertEqual (names (tree.iter_postorder ()), list_post)
+        self.assertEqual (names (tree.iter_limited ()), list_pre)
+        self.assertEqual (sorted (names (tree.iter_breadth_first ()) [1:3]),
+                          ['a', 'd'])
+        self.assertEqual (sorted (names (tree.iter_breadth_first ()) [3:]),
+                          ['b', 'c', 'e'])
+
+        self.assertEqual (sorted (names (tree.iter_limited (1))),
+                          ['', 'a', 'd'])
+        self.assertEqual (sorted (names (tree.iter_limited (
+            prune = lambda x: x.get_name () == 'a'))), ['', 'd', 'e'])
+
+    def test_deep_iterators (self):
+        tree = TestAutoTree.ValueTree ()
+        node = tree
+        for i in xrange (5000):
+            node = node.child ('x')
+
+        self.assertEqual (len (list (tree.iter_preorder ())), 5001)
+        self.assertEqual (len (list (tree.iter_postorder ())), 5001)
+        self.assertEqual (len (list (tree.iter_breadth_first ())), 5001)
+        self.assertEqual (len (list (tree.iter_limited (10))), 11)
+        self.assertTrue (next (tree.iter_postorder ()) is node)
+
+
+def make_wide_tree (fanout, depth):
+    tree = AutoTree ()
+    level = [tree]
+    for i in xrange (depth):
+        new_level = []
+        for node in level:
+            for j in xrange (fanout):
+                new_level.append (node.child (str (j)))
+        level = new_level
+    return tree
+
+
+class TestAutoTreePerformance (unittest.TestCase):
+
+    fanout = 4
+    depth  = 7
+
+    def test_performance_traversal (self):
+        import timeit
+        tree = make_wide_tree (self.fanout, self.depth)
+        nop = lambda x: None
+        def find ():
+            for node in tree.iter_preorder ():
+                if node.get_name () == '1':
+                    return node
+
+        print
+        print "Traversal --", sum (self.fanout ** i
+                                   for i in xrange (self.depth + 1)), "nodes"
+        print "   dfs_preorder:       ", min (timeit.repeat (
+            lambda: tree.dfs_preorder (nop), number = 1, repeat = 3))
+        print "   dfs_postorder:      ", min (timeit.repeat (
+            lambda: tree.dfs_postorder (nop), number = 1, repeat = 3))
+        print "   iter_preorder:      ", min (timeit.repeat (
+            lambda: list (tree.iter_preorder ()), number = 1, repeat = 3))
+        print "   iter_postorder:     ", min (timeit.repeat (
+            lambda: list (tree.iter_postorder ()), number = 1, repeat = 3))
+        print "   iter_breadth_first: ", min (timeit.repeat (
+            lambda: list (tree.iter_breadth_first ()), number = 1, repeat = 3))
+        print "   iter_limited (2):   ", min (timeit.repeat (
+            lambda: list (tree.iter_limited (2)), number = 1, repeat = 3))
+        print "   early stop search:  ", min (timeit.repeat (
+            find, number = 1, repeat = 3))
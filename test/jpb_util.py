@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+#
+#  File:       jpb_util.py
+#  Author:     Juan Pedro Bolívar Puente <raskolnikov@es.gnu.org>
+#  Date:       Mon Oct 19 17:10:02 2026
+#  Time-stamp: <2026-10-19 17:10:02 jbo>
+#
+
+#
+#  Copyright (C) 2012 Juan Pedro Bolívar Puente
+#
+#  This file is part of jpblib.
+#
+#  jpblib is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  jpblib is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import threading
+import time
+import unittest
+
+import jpb.util
+from jpb.util import *
+
+class TestLruMemoize (unittest.TestCase):
+
+    def test_memoize (self):
+        calls = []
+        @lru_memoize ()
+        def add (a, b = 0):
+            """ Adds. """
+            calls.append ((a, b))
+            return a + b
+
+        self.assertEqual (add (1, b = 2), 3)
+        self.assertEqual (add (1, b = 2), 3)
+        self.assertEqual (add (1), 1)
+        self.assertEqual (calls, [(1, 2), (1, 0)])
+        self.assertEqual ((add.hits, add.misses), (1, 2))
+        self.assertEqual (add.__name__, 'add')
+        self.assertEqual (add.__doc__, ' Adds. ')
+
+        add.cache_clear ()
+        add (1, b = 2)
+        self.assertEqual (len (calls), 3)
+        self.assertEqual ((add.hits, add.misses), (0, 1))
+
+    def test_keyword_order (self):
+        @lru_memoize ()
+        def func (a = None, b = None):
+            return object ()
+        self.assertTrue (func (a = 1, b = 2) is func (b = 2, a = 1))
+        self.assertFalse (func (1, 2) is func (a = 1, b = 2))
+
+    def test_lru (self):
+        @lru_memoize (maxsize = 2)
+        def ident (x):
+            return [x]
+
+        one = ident (1)
+        ident (2)
+        self.assertTrue (ident (1) is one)
+        ident (3)
+        self.assertEqual (ident.evictions, 1)
+        self.assertTrue (ident (1) is one)
+        self.assertEqual (ident.misses, 3)
+        ident (2)
+        self.assertEqual (ident.misses, 4)
+
+    def test_ttl (self):
+        clock = [0.0]
+        old_now = jpb.util._now
+        jpb.util._now = lambda: clock [0]
+        try:
+            @lru_memoize (ttl = 10)
+            def ident (x):
+                return [x]
+            one = ident (1)
+            clock [0] = 5
+            self.assertTrue (ident (1) is one)
+            clock [0] = 10
+            self.assertFalse (ident (1) is one)
+            self.assertEqual (ident.evictions, 1)
+        finally:
+            jpb.util._now = old_now
+
+    def test_method (self):
+        class Class (object):
+            @lru_memoize ()
+            def method (self, x):
+                return (self, x)
+        obj = Class ()
+        self.assertEqual (obj.method (1), (obj, 1))
+        self.assertEqual (Class.method.hits, 0)
+        obj.method (1)
+        self.assertEqual (Class.method.hits, 1)
+
+    def test_thread_safe (self):
+        calls = []
+        event = threading.Event ()
+        @lru_memoize (thread_safe = True)
+        def slow (x):
+            calls.append (x)
+            event.wait ()
+            return [x]
+
+        results = []
+        threads = [ threading.Thread (target = lambda: results.append (slow (1)))
+                    for i in xrange (8) ]
+        for t in threads:
+            t.start ()
+        time.sleep (0.05)
+        event.set ()
+        for t in threads:
+            t.join ()
+
+        self.assertEqual (calls, [1])
+        self.assertEqual (len (results), 8)
+        self.assertTrue (all (r is results [0] for r in results))
+        self.assertEqual ((slow.hits, slow.misses), (7, 1))
+
+    def test_thread_safe_error (self):
+        calls = []
+        @lru_memoize (thread_safe = True)
+        def fail (x):
+            calls.append (x)
+            if len (calls) == 1:
+                raise ValueError
+            return x
+        self.assertRaises (ValueError, fail, 1)
+        self.assertEqual (fail (1), 1)
+        self.assertEqual (calls, [1, 1])
+
+
+class Base (object): pass
+class Deriv (Base): pass
+class Other (object): pass
+
+class TestMultiMethod (unittest.TestCase):
+
+    def setUp (self):
+        self.method = MultiMethod ('test')
+        self.method.register ((Base, Base), lambda a, b: 'base-base')
+        self.method.register ((Deriv, Base), lambda a, b: 'deriv-base')
+
+    def test_exact (self):
+        self.assertEqual (self.method (Base (), Base ()), 'base-base')
+        self.assertEqual (self.method (Deriv (), Base ()), 'deriv-base')
+
+    def test_subclass (self):
+        self.assertEqual (self.method (Base (), Deriv ()), 'base-base')
+        self.assertEqual (self.method (Deriv (), Deriv ()), 'deriv-base')
+        self.assertEqual (self.method._cache [(Deriv, Deriv)] (None, None),
+                          'deriv-base')
+
+    def test_no_match (self):
+        self.assertRaises (TypeError, self.method, Other (), Base ())
+        self.assertRaises (TypeError, self.method, Base ())
+
+    def test_ambiguous (self):
+        self.method.register ((Base, Deriv), lambda a, b: 'base-deriv')
+        self.assertRaises (TypeError, self.method, Deriv (), Deriv ())
+        self.method.register ((Deriv, Deriv), lambda a, b: 'deriv-deriv')
+        self.assertEqual (self.method (Deriv (), Deriv ()), 'deriv-deriv')
+
+    def test_register_clears_cache (self):
+        self.assertEqual (self.method (Deriv (), Deriv ()), 'deriv-base')
+        self.method.register ((Deriv, Deriv), lambda a, b: 'deriv-deriv')
+        self.assertEqual (self.method (Deriv (), Deriv ()), 'deriv-deriv')
+
+    def test_duplicate (self):
+        self.assertRaises (TypeError, self.method.register,
+                           (Base, Base), lambda a, b: None)
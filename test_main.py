@@ -35,14 +35,23 @@ from test.jpb_changer import *
 from test.jpb_conf import *
 from test.jpb_connection import *
 from test.jpb_event import *
+from test.jpb_lazy_conf import *
 from test.jpb_log import *
+from test.jpb_log_async import *
+from test.jpb_log_mp import *
+from test.jpb_log_ring import *
+from test.jpb_log_performance import *
+from test.jpb_log_binary import *
+from test.jpb_log_rotate import *
 from test.jpb_meta import *
 from test.jpb_observer import *
 from test.jpb_observer_old import *
+from test.jpb_proxy import *
 from test.jpb_sender import *
 from test.jpb_signal import *
 from test.jpb_singleton import *
 from test.jpb_tree import *
+from test.jpb_util import *
 from test.jpb_xml_conf import *
 
 import unittest